@@ -0,0 +1,424 @@
+"""
+Vectorized batch evaluation
+Evaluates many configurations at once as a NumPy boolean selection matrix
+against the masks compiled by constraint_engine
+"""
+
+import weakref
+from datetime import date
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+from catalog_image import get_catalog_image
+from constraint_engine import OptionIndex, CompiledConstraints
+from discount_rules import describe
+
+# Rows evaluated together per model before results are streamed out
+BATCH_CHUNK_SIZE = 1024
+
+VALIDATION_FAILED = {"type": "validation_error", "message": "Configuration validation failed"}
+
+# BatchValidator matrices, in the order they are stored in a catalog image
+VALIDATOR_ARRAYS = ("incompatible", "required_base", "required", "required_counts", "package_base",
+                    "package_required", "package_required_counts", "model_required", "model_excluded",
+                    "drivetrain_table")
+
+
+def mask_to_row(mask: int, width: int) -> np.ndarray:
+    """Expand an integer bitmask into a boolean row"""
+    return np.array([mask >> bit & 1 for bit in range(width)], dtype=bool)
+
+
+def mask_matrix(masks: Iterable[int], width: int) -> np.ndarray:
+    """Stack integer bitmasks into a (rules x options) boolean matrix"""
+    rows = [mask_to_row(mask, width) for mask in masks]
+    if not rows:
+        return np.zeros((0, width), dtype=bool)
+    return np.vstack(rows)
+
+
+def selection_matrix(index: OptionIndex, configurations: List[Dict[str, Any]]) -> np.ndarray:
+    """(configurations x options) boolean matrix of selected interned options"""
+    matrix = np.zeros((len(configurations), len(index)), dtype=bool)
+    for row, configuration in enumerate(configurations):
+        for key, value in configuration.items():
+            if value:
+                bit = index.get(key)
+                if bit is not None:
+                    matrix[row, bit] = True
+    return matrix
+
+
+class BatchValidator:
+    """Matrix form of one model's CompiledConstraints"""
+
+    def __init__(self, compiled: CompiledConstraints, arrays: Optional[Dict[str, np.ndarray]] = None):
+        self.compiled = compiled
+        self.index = compiled.index
+        # Engine x option table of compatible drivetrains, one row per engine
+        self.engines = {engine: row for row, engine in enumerate(compiled.drivetrain_masks)}
+        if arrays is not None:
+            # Precompiled (e.g. memory-mapped from a catalog image): use in place
+            for field in VALIDATOR_ARRAYS:
+                setattr(self, field, arrays[field])
+            return
+
+        width = len(self.index)
+        self.incompatible = mask_matrix([mask for mask, _ in compiled.incompatible_rules], width).astype(np.int32)
+
+        self.required_base = np.array(
+            [base_mask.bit_length() - 1 for base_mask, _, _ in compiled.required_rules], dtype=np.intp)
+        self.required = mask_matrix([mask for _, mask, _ in compiled.required_rules], width).astype(np.int32)
+        self.required_counts = self.required.sum(axis=1)
+
+        self.package_base = np.array([bit for bit, _, _, _ in compiled.package_rules], dtype=np.intp)
+        self.package_required = mask_matrix([mask for _, mask, _, _ in compiled.package_rules], width).astype(np.int32)
+        self.package_required_counts = self.package_required.sum(axis=1)
+
+        self.model_required = mask_to_row(compiled.model_required_mask, width)
+        self.model_excluded = mask_to_row(compiled.model_excluded_mask, width)
+        self.drivetrain_table = mask_matrix(compiled.drivetrain_masks.values(), width)
+
+    def drivetrain_failures(self, configurations: List[Dict[str, Any]]) -> np.ndarray:
+        """Rows whose selected engine and drivetrain are incompatible"""
+        count = len(configurations)
+        engine_rows = np.full(count, -1, dtype=np.intp)
+        drivetrain_bits = np.full(count, -1, dtype=np.intp)
+        checked = np.zeros(count, dtype=bool)
+        for row, configuration in enumerate(configurations):
+            engine = configuration.get("engine")
+            drivetrain = configuration.get("drivetrain")
+            if engine and drivetrain:
+                checked[row] = True
+                if isinstance(engine, str) and isinstance(drivetrain, str):
+                    engine_rows[row] = self.engines.get(engine, -1)
+                    bit = self.index.get(drivetrain)
+                    drivetrain_bits[row] = -1 if bit is None else bit
+        known = (engine_rows >= 0) & (drivetrain_bits >= 0)
+        compatible = np.zeros(count, dtype=bool)
+        if self.drivetrain_table.size:
+            compatible[known] = self.drivetrain_table[engine_rows[known], drivetrain_bits[known]]
+        return checked & ~compatible
+
+    def invalid_rows(self, configurations: List[Dict[str, Any]], blocked: Optional[np.ndarray] = None) -> np.ndarray:
+        """Boolean vector marking every configuration that breaks at least one rule
+
+        blocked: row of options that are out of season for the requested dates
+        """
+        selection = selection_matrix(self.index, configurations)
+        counts = selection.astype(np.int32)
+
+        invalid = self.drivetrain_failures(configurations)
+        if len(self.incompatible):
+            invalid |= (counts @ self.incompatible.T > 1).any(axis=1)
+        if len(self.required):
+            missing = counts @ self.required.T < self.required_counts
+            invalid |= (selection[:, self.required_base] & missing).any(axis=1)
+        if len(self.package_required):
+            missing = counts @ self.package_required.T < self.package_required_counts
+            invalid |= (selection[:, self.package_base] & missing).any(axis=1)
+        invalid |= (selection & self.model_required).sum(axis=1) < self.model_required.sum()
+        invalid |= (selection & self.model_excluded).any(axis=1)
+        if blocked is not None:
+            invalid |= (selection & blocked).any(axis=1)
+        return invalid
+
+
+_validators: "weakref.WeakKeyDictionary[CompiledConstraints, BatchValidator]" = weakref.WeakKeyDictionary()
+
+
+def get_batch_validator(compiled: CompiledConstraints, image=None) -> BatchValidator:
+    """Matrix form of compiled constraints, built (or mapped from the catalog image) once per model"""
+    validator = _validators.get(compiled)
+    if validator is None:
+        arrays = image.validator_arrays(compiled.model_name) if image is not None else None
+        validator = _validators[compiled] = BatchValidator(compiled, arrays)
+    return validator
+
+
+def group_by_model(rows: List[Tuple[str, Any]]) -> Dict[str, List[int]]:
+    """Positions of each model's rows, keeping input order within a model"""
+    groups: Dict[str, List[int]] = {}
+    for position, (model_name, _) in enumerate(rows):
+        groups.setdefault(model_name, []).append(position)
+    return groups
+
+
+def validate_batch(catalog, rows: List[Tuple[str, Any]], order_date: Optional[date] = None,
+                   production_date: Optional[date] = None) -> Iterator[Dict[str, Any]]:
+    """Yield one validation result per (model, configuration) row, in input order
+
+    Seasonal availability is checked against whichever of the dates are given.
+    """
+    blocked_mask = catalog.seasonal.blocked_mask(order_date, production_date)
+    blocked = mask_to_row(blocked_mask, len(catalog.option_index)) if blocked_mask else None
+    for start in range(0, len(rows), BATCH_CHUNK_SIZE):
+        chunk = rows[start:start + BATCH_CHUNK_SIZE]
+        results: List[Dict[str, Any]] = [None] * len(chunk)
+
+        for model_name, positions in group_by_model(chunk).items():
+            compiled = catalog.get_constraint_engine(model_name)
+            well_formed = [p for p in positions if isinstance(chunk[p][1], dict)]
+            configurations = [chunk[p][1] for p in well_formed]
+            validator = get_batch_validator(compiled, get_catalog_image(catalog))
+            invalid = validator.invalid_rows(configurations, blocked) if configurations else []
+
+            for position, configuration, is_invalid in zip(well_formed, configurations, invalid):
+                # Only failing rows pay for building the detailed error structures
+                try:
+                    errors = []
+                    if is_invalid:
+                        selection = compiled.index.selection_mask(configuration)
+                        errors = compiled.errors(configuration, selection)
+                        errors.extend(catalog.seasonal.errors(selection, order_date, production_date))
+                except Exception:
+                    errors = [dict(VALIDATION_FAILED)]
+                results[position] = {
+                    "index": start + position,
+                    "model": model_name,
+                    "valid": not errors,
+                    "errors": errors,
+                    "warnings": []
+                }
+            for position in set(positions).difference(well_formed):
+                results[position] = {
+                    "index": start + position,
+                    "model": model_name,
+                    "valid": False,
+                    "errors": [dict(VALIDATION_FAILED)],
+                    "warnings": []
+                }
+
+        yield from results
+
+
+# (configuration key, pricing table, itemized category, breakdown field) for single-value selections
+PRICED_SLOTS = (
+    ("engine", "engines", "Engine", "engine_upgrade"),
+    ("drivetrain", "drivetrains", "Drivetrain", "drivetrain_upgrade"),
+    ("exterior_color", "exterior_colors", "Exterior", "exterior_options"),
+    ("wheels", "wheel_options", "Exterior", "exterior_options"),
+    ("interior", "interior_options", "Interior", "interior_options"),
+)
+PRICE_FIELDS = ("engine_upgrade", "drivetrain_upgrade", "exterior_options", "interior_options",
+                "packages", "individual_options")
+DESTINATION_FEE = 995
+TAX_RATE = 0.08
+
+PRICING_FAILED = {"error": "Price calculation failed"}
+
+
+def slot_item_name(key: str, code: str, entry: Dict[str, Any]) -> str:
+    """Itemized label for a single-value selection, as calculate_total_price writes it"""
+    if key in ("engine", "drivetrain"):
+        return entry["name"]
+    if key == "exterior_color":
+        return f"{code.replace('_', ' ')} Paint"
+    return code.replace("_", " ")
+
+
+class BatchPricer:
+    """Catalog price vector with one column per priced selection"""
+
+    def __init__(self, catalog, image=None):
+        self.catalog = catalog
+        pricing = catalog.pricing
+        prices: List[int] = []
+        fields: List[str] = []
+        self.items: List[Any] = []
+
+        def add_column(price, field, item):
+            prices.append(price)
+            fields.append(field)
+            self.items.append(item)
+            return len(prices) - 1
+
+        # Single-value slots are keyed by the selected value; zero-cost picks are not itemized
+        self.slot_columns = []
+        for key, table, category, field in PRICED_SLOTS:
+            columns = {}
+            for code, entry in pricing[table].items():
+                price = entry["price"]
+                item = {"item": slot_item_name(key, code, entry), "price": price, "category": category}
+                columns[code] = add_column(price, field, item if price > 0 else None)
+            self.slot_columns.append((key, columns))
+
+        # Packages and individual options are keyed by the configuration key itself
+        self.package_columns = {
+            code: add_column(entry["price"], "packages",
+                             {"item": code.replace("_", " "), "price": entry["price"], "category": "Package"})
+            for code, entry in pricing["packages"].items()
+        }
+        self.option_columns = {
+            code: add_column(entry["price"], "individual_options",
+                             {"item": code.replace("_", " "), "price": entry["price"], "category": "Option"})
+            for code, entry in pricing["individual_options"].items()
+        }
+
+        if image is not None and image.has("pricer/prices"):
+            # Same column order as built above; the vector itself is read from the mapping
+            self.prices = image.array("pricer/prices")
+        else:
+            self.prices = np.array(prices, dtype=np.int64)
+        fields_array = np.array(fields)
+        self.field_masks = {field: fields_array == field for field in PRICE_FIELDS}
+
+        # Discount rules as (rules x rule options) matrices over the options they mention
+        discounts = catalog.discounts
+        self.discount_rules = discounts.rules
+        self.discount_columns = {code: column for column, code in enumerate(discounts.codes)}
+        bits = [catalog.option_index.get(code) for code in discounts.codes]
+        self.discount_all = np.array([[rule.all_mask >> bit & 1 for bit in bits] for rule in discounts.rules],
+                                     dtype=np.int32).reshape(len(discounts.rules), len(bits))
+        self.discount_any = np.array([[rule.any_mask >> bit & 1 for bit in bits] for rule in discounts.rules],
+                                     dtype=np.int32).reshape(len(discounts.rules), len(bits))
+        self.discount_all_counts = self.discount_all.sum(axis=1)
+        self.discount_min_any = np.array([rule.min_any for rule in discounts.rules], dtype=np.int64)
+        self.discount_min_packages = np.array([rule.min_packages for rule in discounts.rules], dtype=np.int64)
+        amounts = [rule.amount for rule in discounts.rules]
+        self.discount_amounts = np.array(amounts, dtype=np.int64 if all(isinstance(amount, int) for amount in amounts)
+                                         else np.float64)
+
+    def selection(self, configurations: List[Dict[str, Any]]):
+        """Selection matrix, itemized column order and discount inputs for each row"""
+        count = len(configurations)
+        matrix = np.zeros((count, len(self.prices)), dtype=bool)
+        discount_flags = np.zeros((count, len(self.discount_columns)), dtype=np.int32)
+        package_counts = np.zeros(count, dtype=np.int64)
+        orders = []
+
+        for row, configuration in enumerate(configurations):
+            order = []
+            for key, columns in self.slot_columns:
+                value = configuration.get(key)
+                if value:
+                    column = columns.get(value)
+                    if column is not None:
+                        matrix[row, column] = True
+                        order.append(column)
+            options = []
+            for key, value in configuration.items():
+                if not value:
+                    continue
+                column = self.discount_columns.get(key)
+                if column is not None:
+                    discount_flags[row, column] = 1
+                if key.endswith("_Package"):
+                    package_counts[row] += 1
+                    column = self.package_columns.get(key)
+                    if column is not None:
+                        matrix[row, column] = True
+                        order.append(column)
+                column = self.option_columns.get(key)
+                if column is not None:
+                    matrix[row, column] = True
+                    options.append(column)
+            orders.append(order + options)
+
+        return matrix, orders, discount_flags, package_counts
+
+    def applied_discounts(self, discount_flags: np.ndarray, package_counts: np.ndarray) -> np.ndarray:
+        """(rows x rules) matrix of the discount rules that apply, every rule in one pass"""
+        return ((discount_flags @ self.discount_all.T == self.discount_all_counts)
+                & (discount_flags @ self.discount_any.T >= self.discount_min_any)
+                & (package_counts[:, None] >= self.discount_min_packages))
+
+    def quote(self, model_name: str, configurations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Price breakdowns for many configurations of one model, as calculate_total_price returns them"""
+        base_price = self.catalog.get_model_data(model_name).get("base_price", 50000)
+        matrix, orders, discount_flags, package_counts = self.selection(configurations)
+
+        amounts = matrix * self.prices
+        totals = {field: amounts[:, mask].sum(axis=1) for field, mask in self.field_masks.items()}
+        applied = self.applied_discounts(discount_flags, package_counts)
+        discounts = applied @ self.discount_amounts
+        subtotals = base_price + sum(totals.values()) - discounts
+        total_msrp = subtotals + DESTINATION_FEE
+        taxes = total_msrp * TAX_RATE
+        estimated_totals = total_msrp + taxes
+
+        columns = {field: values.tolist() for field, values in totals.items()}
+        columns.update(package_discount=discounts.tolist(), subtotal=subtotals.tolist(),
+                       total_msrp=total_msrp.tolist(), estimated_taxes=taxes.tolist(),
+                       estimated_total=estimated_totals.tolist())
+
+        breakdowns = []
+        for row, order in enumerate(orders):
+            breakdowns.append({
+                "base_price": base_price,
+                "engine_upgrade": columns["engine_upgrade"][row],
+                "drivetrain_upgrade": columns["drivetrain_upgrade"][row],
+                "exterior_options": columns["exterior_options"][row],
+                "interior_options": columns["interior_options"][row],
+                "packages": columns["packages"][row],
+                "individual_options": columns["individual_options"][row],
+                "subtotal": columns["subtotal"][row],
+                "package_discount": columns["package_discount"][row],
+                "destination_fee": DESTINATION_FEE,
+                "total_msrp": columns["total_msrp"][row],
+                "estimated_taxes": columns["estimated_taxes"][row],
+                "estimated_total": columns["estimated_total"][row],
+                "itemized_breakdown": [dict(self.items[column]) for column in order
+                                       if self.items[column] is not None],
+                "applied_discounts": [describe(self.discount_rules[rule]) for rule in np.flatnonzero(applied[row])]
+            })
+        return breakdowns
+
+
+_pricers: "weakref.WeakKeyDictionary[Any, BatchPricer]" = weakref.WeakKeyDictionary()
+
+
+def get_batch_pricer(catalog) -> BatchPricer:
+    """Price vector for a catalog, built (or mapped from its catalog image) once per catalog instance"""
+    pricer = _pricers.get(catalog)
+    if pricer is None:
+        pricer = _pricers[catalog] = BatchPricer(catalog, get_catalog_image(catalog))
+    return pricer
+
+
+def is_priceable(configuration: Any) -> bool:
+    """Whether calculate_total_price could price this configuration"""
+    if not isinstance(configuration, dict):
+        return False
+    try:
+        for key, _, _, _ in PRICED_SLOTS:
+            hash(configuration.get(key))
+    except TypeError:
+        return False
+    return True
+
+
+def price_batch(catalog, rows: List[Tuple[str, Any]], order_date: Optional[date] = None,
+                production_date: Optional[date] = None) -> Iterator[Dict[str, Any]]:
+    """Yield one price breakdown per (model, configuration) row, in input order
+
+    As in calculate_total_price, options out of season on the given dates are not
+    priced and are listed under unavailable_options.
+    """
+    pricer = get_batch_pricer(catalog)
+    blocked = catalog.seasonal.blocked_mask(order_date, production_date)
+    for start in range(0, len(rows), BATCH_CHUNK_SIZE):
+        chunk = rows[start:start + BATCH_CHUNK_SIZE]
+        results: List[Dict[str, Any]] = [None] * len(chunk)
+
+        for model_name, positions in group_by_model(chunk).items():
+            well_formed = [p for p in positions if is_priceable(chunk[p][1])]
+            configurations = [chunk[p][1] for p in well_formed]
+            unavailable = [[] for _ in configurations]
+            if blocked:
+                unavailable = [catalog.seasonal.unavailable(catalog.option_index.selection_mask(configuration), blocked)
+                               for configuration in configurations]
+                configurations = [
+                    {key: value for key, value in configuration.items() if key not in codes} if codes else configuration
+                    for configuration, codes in zip(configurations, unavailable)
+                ]
+            breakdowns = pricer.quote(model_name, configurations) if configurations else []
+            for position, breakdown, codes in zip(well_formed, breakdowns, unavailable):
+                results[position] = {"index": start + position, "model": model_name, **breakdown}
+                if codes:
+                    results[position]["unavailable_options"] = codes
+            for position in set(positions).difference(well_formed):
+                results[position] = {"index": start + position, "model": model_name, **PRICING_FAILED}
+
+        yield from results
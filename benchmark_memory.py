@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+BMW Catalog Memory Benchmark
+Measures what one worker pays to hold the catalog: the previous layout (plain
+nested dicts plus unshared per-model views) against the interned, shared
+catalog. Each layout is built in a fresh interpreter so resident sizes do not
+bleed into each other.
+"""
+
+import argparse
+import gc
+import json
+import subprocess
+import sys
+import tracemalloc
+from typing import Dict, Any, List, Optional
+
+LAYOUTS = ("legacy", "compact")
+
+
+def resident_kb() -> int:
+    """Current resident set size of this process (Linux /proc; 0 elsewhere)"""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def build_legacy(tables: Dict[str, Any]) -> List[Any]:
+    """Catalog as it used to be held: raw tables and a separate frozen copy per model"""
+    from bmw_configurator_data import BMWConfiguratorData
+    from catalog_model import freeze
+
+    catalog = BMWConfiguratorData.__new__(BMWConfiguratorData)
+    catalog.models_data = tables["models"]
+    catalog.constraints = tables["constraints"]
+    catalog.pricing = tables["pricing"]
+    catalog.packages = tables["packages"]
+    return [
+        tables,
+        freeze(catalog._build_model_constraints(None)),
+        {model: freeze(catalog._build_model_constraints(model)) for model in tables["models"]},
+        {model: freeze(catalog._build_available_options(model)) for model in tables["models"]},
+    ]
+
+
+def build_compact(tables: Dict[str, Any]) -> Any:
+    from bmw_configurator_data import BMWConfiguratorData
+    catalog = BMWConfiguratorData(tables)
+    # Rule bitmasks exist in both layouts; drop them so only the catalog storage is compared
+    catalog._constraint_engines = catalog._base_constraint_engine = catalog.option_index = None
+    return catalog
+
+
+def measure(layout: str, copies: int, snapshot: Optional[str]) -> Dict[str, Any]:
+    """Build `copies` catalogs in this process and report the memory they hold"""
+    from bmw_configurator_data import BMWConfiguratorData
+    from catalog_store import parse_snapshot, read_snapshot
+
+    def load_tables():
+        # Fresh tables per copy, decoded the way a worker loads them
+        if snapshot:
+            return parse_snapshot(read_snapshot(snapshot))
+        return json.loads(json.dumps(BMWConfiguratorData.builtin_tables()))
+
+    build = build_legacy if layout == "legacy" else build_compact
+    gc.collect()
+    rss_before = resident_kb()
+    tracemalloc.start()
+    held = [build(load_tables()) for _ in range(copies)]
+    gc.collect()
+    traced_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_after = resident_kb()
+    return {
+        "layout": layout,
+        "copies": len(held),
+        "bytes_per_catalog": traced_bytes // copies,
+        "rss_before_kb": rss_before,
+        "rss_after_kb": rss_after,
+        "rss_per_catalog_kb": round((rss_after - rss_before) / copies, 1)
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare per-worker catalog memory of the legacy and compact layouts")
+    parser.add_argument("--copies", type=int, default=50,
+                        help="Catalogs built per run, so small catalogs rise above RSS noise")
+    parser.add_argument("--workers", type=int, default=8, help="Workers per box used for the projection")
+    parser.add_argument("--snapshot", help="Measure a catalog snapshot file instead of the built-in catalog")
+    parser.add_argument("--layout", choices=LAYOUTS, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.layout:
+        # Child mode: measure one layout and report as JSON
+        print(json.dumps(measure(args.layout, args.copies, args.snapshot)))
+        return 0
+
+    results = {}
+    for layout in LAYOUTS:
+        command = [sys.executable, __file__, "--layout", layout, "--copies", str(args.copies)]
+        if args.snapshot:
+            command += ["--snapshot", args.snapshot]
+        output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+        results[layout] = json.loads(output)
+
+    print(f"{'layout':<10} {'bytes/catalog':>14} {'RSS/catalog':>12} {'worker RSS':>11}")
+    for layout, result in results.items():
+        print(f"{layout:<10} {result['bytes_per_catalog']:>14,} {result['rss_per_catalog_kb']:>9.1f} KB "
+              f"{result['rss_before_kb'] + result['rss_per_catalog_kb']:>8,.0f} KB")
+
+    saved = results["legacy"]["bytes_per_catalog"] - results["compact"]["bytes_per_catalog"]
+    ratio = results["compact"]["bytes_per_catalog"] / results["legacy"]["bytes_per_catalog"]
+    print(f"\nCompact catalog is {ratio:.0%} of the legacy size, saving {saved:,} bytes per catalog "
+          f"({saved * args.workers / 1024:,.0f} KB across {args.workers} workers)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
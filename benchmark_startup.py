@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+BMW Configurator Startup Benchmark
+Measures how quickly a fresh worker becomes ready: the time to import app.py,
+the latency of its first catalog requests and what the first AI request pays
+to build the Gemini client. The eager mode initializes everything at import,
+as app.py used to, for comparison.
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, Any, List, Optional
+
+MODES = ("lazy", "eager")
+
+# Dependencies that should stay unloaded until a request needs them
+HEAVY_MODULES = ("google.generativeai", "numpy", "requests", "bs4")
+
+FIRST_REQUESTS = ("/api/series", "/api/options/X5")
+
+
+def measure(mode: str) -> Dict[str, Any]:
+    """Import the app and serve its first requests in this (fresh) interpreter"""
+    import logging
+    logging.disable(logging.CRITICAL)
+
+    started = time.perf_counter()
+    import app
+    if mode == "eager":
+        # What importing app.py used to do: load every dependency and build the client
+        import batch_engine  # noqa: F401
+        import bs4  # noqa: F401
+        import requests  # noqa: F401
+        app.get_gemini_model()
+    import_seconds = time.perf_counter() - started
+    loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+
+    client = app.app.test_client()
+    first_requests = {}
+    for url in FIRST_REQUESTS:
+        started = time.perf_counter()
+        client.get(url)
+        first_requests[url] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    app.get_gemini_model()
+    gemini_seconds = time.perf_counter() - started
+
+    return {
+        "mode": mode,
+        "import_ms": import_seconds * 1000,
+        "first_request_ms": {url: seconds * 1000 for url, seconds in first_requests.items()},
+        "ready_ms": (import_seconds + sum(first_requests.values())) * 1000,
+        "first_gemini_ms": gemini_seconds * 1000,
+        "loaded_at_import": loaded
+    }
+
+
+def run(mode: str, runs: int) -> Dict[str, Any]:
+    """Median of several fresh-interpreter measurements"""
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, __file__, "--mode", mode],
+                                check=True, capture_output=True, text=True).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        "mode": mode,
+        "import_ms": statistics.median(sample["import_ms"] for sample in samples),
+        "ready_ms": statistics.median(sample["ready_ms"] for sample in samples),
+        "first_request_ms": {
+            url: statistics.median(sample["first_request_ms"][url] for sample in samples)
+            for url in FIRST_REQUESTS
+        },
+        "first_gemini_ms": statistics.median(sample["first_gemini_ms"] for sample in samples),
+        "loaded_at_import": samples[-1]["loaded_at_import"]
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure worker cold-start time")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per mode (median is reported)")
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.mode:
+        # Child mode: one measurement as JSON on the last line
+        print(json.dumps(measure(args.mode)))
+        return 0
+
+    results = [run(mode, args.runs) for mode in MODES]
+    print(f"{'mode':<6} {'import':>9} {'ready':>9} " + " ".join(f"{url:>18}" for url in FIRST_REQUESTS)
+          + f" {'first AI':>9}  loaded at import")
+    for result in results:
+        requests_ms = " ".join(f"{result['first_request_ms'][url]:>15.1f} ms" for url in FIRST_REQUESTS)
+        print(f"{result['mode']:<6} {result['import_ms']:>6.0f} ms {result['ready_ms']:>6.0f} ms {requests_ms} "
+              f"{result['first_gemini_ms']:>6.0f} ms  {', '.join(result['loaded_at_import']) or '-'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
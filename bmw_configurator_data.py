@@ -4,16 +4,95 @@ Based on actual BMW USA configurator data and constraints
 """
 
 import json
-from typing import Dict, List, Any
+import hashlib
+from datetime import date
+from typing import Dict, Any, Optional
+from constraint_engine import (OptionIndex, CompiledConstraints, SeasonalAvailability, ValidationState,
+                               collect_rule_codes, start_state, apply_change)
+from catalog_model import EMPTY_VIEW, CatalogInterner
+from discount_rules import CompiledDiscounts
+
 
 class BMWConfiguratorData:
     """Comprehensive BMW configurator data with real constraints"""
     
-    def __init__(self):
-        self.models_data = self._load_models_data()
-        self.constraints = self._load_constraints()
-        self.pricing = self._load_pricing()
-        self.packages = self._load_packages()
+    # Top-level sections of a catalog snapshot
+    TABLES = ("models", "constraints", "pricing", "packages")
+    
+    def __init__(self, tables: Optional[Dict[str, Any]] = None):
+        """Build from catalog snapshot tables, or from the built-in catalog when none are given"""
+        if tables is None:
+            tables = self.builtin_tables()
+        missing = [name for name in self.TABLES if name not in tables]
+        if missing:
+            raise ValueError(f"Catalog snapshot is missing: {', '.join(missing)}")
+        # Interned and hash-consed: repeated strings, lists and sub-tables are stored once.
+        # The interner's pool is only needed while compiling and is dropped afterwards.
+        interner = CatalogInterner()
+        self.models_data = interner.freeze(tables["models"])
+        self.constraints = interner.freeze(tables["constraints"])
+        self.pricing = interner.freeze(tables["pricing"])
+        self.packages = interner.freeze(tables["packages"])
+        self._compile_catalog(interner)
+    
+    @classmethod
+    def builtin_tables(cls) -> Dict[str, Any]:
+        """The catalog shipped with the application, as snapshot tables"""
+        loader = cls.__new__(cls)
+        return {
+            "models": loader._load_models_data(),
+            "constraints": loader._load_constraints(),
+            "pricing": loader._load_pricing(),
+            "packages": loader._load_packages()
+        }
+    
+    def to_tables(self) -> Dict[str, Any]:
+        """Source tables of this catalog, suitable for writing a snapshot"""
+        return {
+            "models": self.models_data,
+            "constraints": self.constraints,
+            "pricing": self.pricing,
+            "packages": self.packages
+        }
+        
+    def _compile_catalog(self, interner: CatalogInterner):
+        """Compile one frozen options/constraints view per model at load time"""
+        # Content hash of the source tables; changes whenever any catalog data changes
+        source = json.dumps([self.models_data, self.constraints, self.pricing, self.packages], sort_keys=True)
+        self.version = hashlib.sha256(source.encode("utf-8")).hexdigest()[:16]
+        
+        self._base_constraints = interner.freeze(self._build_model_constraints(None))
+        self._model_constraints = {
+            model_name: interner.freeze(self._build_model_constraints(model_name))
+            for model_name in self.models_data
+        }
+        self._available_options = {
+            model_name: interner.freeze(self._build_available_options(model_name))
+            for model_name in self.models_data
+        }
+        
+        # Intern every rule code once, then compile each model's rules to bitmasks
+        self.option_index = OptionIndex()
+        for constraints in [self._base_constraints, *self._model_constraints.values()]:
+            for code in collect_rule_codes(constraints):
+                self.option_index.intern(code)
+        # Seasonal options become one blocked-options mask per month (interns their codes too)
+        self.seasonal = SeasonalAvailability(self.constraints.get("seasonal_availability", EMPTY_VIEW),
+                                             self.option_index)
+        # Snapshots written before discounts were catalog data keep the built-in rules
+        discount_rules = self.pricing.get("package_discounts")
+        if discount_rules is None:
+            discount_rules = self._load_pricing()["package_discounts"]
+        self.discounts = CompiledDiscounts(discount_rules, self.option_index)
+        self._base_constraint_engine = CompiledConstraints(None, self._base_constraints, self.option_index)
+        self._constraint_engines = {
+            model_name: CompiledConstraints(model_name, constraints, self.option_index)
+            for model_name, constraints in self._model_constraints.items()
+        }
+        
+    def get_constraint_engine(self, model_name: str) -> CompiledConstraints:
+        """Get the bitset-compiled constraints for a model"""
+        return self._constraint_engines.get(model_name, self._base_constraint_engine)
         
     def _load_models_data(self) -> Dict[str, Any]:
         """Load comprehensive model data with specifications"""
@@ -418,7 +497,31 @@ class BMWConfiguratorData:
                 "Carbon_Fiber_Trim": {"price": 1500},
                 "Sport_Exhaust": {"price": 800},
                 "M_Performance_Exhaust": {"price": 2200}
-            }
+            },
+            
+            # Package discounts, evaluated by discount_rules.CompiledDiscounts
+            "package_discounts": [
+                {
+                    "id": "premium_technology_combo",
+                    "description": "Premium + Technology Package combo",
+                    "amount": 500,
+                    "all_of": ["Premium_Package", "Technology_Package"]
+                },
+                {
+                    "id": "m_package_bundle",
+                    "description": "Additional M package discount",
+                    "amount": 300,
+                    "all_of": ["M_Sport_Package"],
+                    "any_of": ["M_Sport_Package", "M_Performance_Package", "M_Competition_Package"],
+                    "min_any": 2
+                },
+                {
+                    "id": "multi_package",
+                    "description": "Multi-package discount",
+                    "amount": 200,
+                    "min_packages": 3
+                }
+            ]
         }
     
     def _load_packages(self) -> Dict[str, Any]:
@@ -545,7 +648,11 @@ class BMWConfiguratorData:
         return self.models_data.get(model_name, {})
     
     def get_available_options(self, model_name: str) -> Dict[str, Any]:
-        """Get all available options for a model with pricing and constraints"""
+        """Get all available options for a model with pricing and constraints (read-only)"""
+        return self._available_options.get(model_name, EMPTY_VIEW)
+    
+    def _build_available_options(self, model_name: str) -> Dict[str, Any]:
+        """Build the options view for a model (used by the compile step)"""
         model_data = self.get_model_data(model_name)
         if not model_data:
             return {}
@@ -558,7 +665,8 @@ class BMWConfiguratorData:
             "interior": self.pricing["interior_options"],
             "packages": {},
             "individual_options": self.pricing["individual_options"],
-            "constraints": self.get_model_constraints(model_name)
+            "constraints": self._build_model_constraints(model_name),
+            "seasonal_availability": self.constraints.get("seasonal_availability", {})
         }
         
         # Filter engines available for this model
@@ -579,7 +687,11 @@ class BMWConfiguratorData:
         return available_options
     
     def get_model_constraints(self, model_name: str) -> Dict[str, Any]:
-        """Get all constraints that apply to a specific model"""
+        """Get all constraints that apply to a specific model (read-only)"""
+        return self._model_constraints.get(model_name, self._base_constraints)
+    
+    def _build_model_constraints(self, model_name: str) -> Dict[str, Any]:
+        """Build the constraints view for a model (used by the compile step)"""
         base_constraints = {
             "engine_drivetrain": self.constraints["engine_drivetrain_constraints"],
             "package_dependencies": self.constraints["package_dependencies"],
@@ -594,8 +706,13 @@ class BMWConfiguratorData:
         
         return base_constraints
     
-    def validate_configuration(self, model_name: str, configuration: Dict[str, Any]) -> Dict[str, Any]:
-        """Validate a configuration against all constraints"""
+    def validate_configuration(self, model_name: str, configuration: Dict[str, Any],
+                               order_date: Optional[date] = None,
+                               production_date: Optional[date] = None) -> Dict[str, Any]:
+        """Validate a configuration against all constraints
+
+        Seasonal availability is checked against whichever of the dates are given.
+        """
         validation_result = {
             "valid": True,
             "errors": [],
@@ -603,94 +720,45 @@ class BMWConfiguratorData:
             "suggestions": []
         }
         
-        constraints = self.get_model_constraints(model_name)
-        
-        # Validate engine/drivetrain compatibility
-        selected_engine = configuration.get("engine")
-        selected_drivetrain = configuration.get("drivetrain")
-        
-        if selected_engine and selected_drivetrain:
-            compatible_drivetrains = constraints["engine_drivetrain"].get(selected_engine, [])
-            if selected_drivetrain not in compatible_drivetrains:
-                validation_result["valid"] = False
-                validation_result["errors"].append({
-                    "type": "engine_drivetrain_incompatible",
-                    "message": f"Engine {selected_engine} is not compatible with {selected_drivetrain}",
-                    "available_drivetrains": compatible_drivetrains
-                })
-        
-        # Validate package dependencies
-        selected_packages = [k for k, v in configuration.items() if k.endswith("_Package") and v]
-        for package in selected_packages:
-            if package in constraints["package_dependencies"]:
-                required_packages = constraints["package_dependencies"][package]
-                missing_packages = [req for req in required_packages if not configuration.get(req)]
-                if missing_packages:
-                    validation_result["valid"] = False
-                    validation_result["errors"].append({
-                        "type": "missing_required_packages",
-                        "message": f"Package {package} requires: {', '.join(missing_packages)}",
-                        "missing_packages": missing_packages
-                    })
-        
-        # Check incompatible options
-        selected_options = [k for k, v in configuration.items() if v]
-        for constraint in constraints["incompatible_options"]:
-            conflicting_options = [opt for opt in constraint["options"] if opt in selected_options]
-            if len(conflicting_options) > 1:
-                validation_result["valid"] = False
-                validation_result["errors"].append({
-                    "type": "incompatible_options",
-                    "message": f"Cannot select {' and '.join(conflicting_options)}: {constraint['reason']}",
-                    "conflicting_options": conflicting_options
-                })
-        
-        # Check required combinations
-        for requirement in constraints["required_combinations"]:
-            if configuration.get(requirement["base"]):
-                missing_required = [req for req in requirement["requires"] if not configuration.get(req)]
-                if missing_required:
-                    validation_result["valid"] = False
-                    validation_result["errors"].append({
-                        "type": "missing_required_options",
-                        "message": f"{requirement['base']} requires: {', '.join(missing_required)}",
-                        "missing_options": missing_required,
-                        "reason": requirement["reason"]
-                    })
-        
-        # Model-specific validations
-        if "model_specific" in constraints:
-            model_constraints = constraints["model_specific"]
-            
-            # Check required options for this model
-            if "required_options" in model_constraints:
-                missing_required = [opt for opt in model_constraints["required_options"] 
-                                  if not configuration.get(opt)]
-                if missing_required:
-                    validation_result["valid"] = False
-                    validation_result["errors"].append({
-                        "type": "model_required_options",
-                        "message": f"{model_name} requires: {', '.join(missing_required)}",
-                        "missing_options": missing_required
-                    })
-            
-            # Check excluded options for this model
-            if "excluded_options" in model_constraints:
-                conflicting_options = [opt for opt in model_constraints["excluded_options"]
-                                     if configuration.get(opt)]
-                if conflicting_options:
-                    validation_result["valid"] = False
-                    validation_result["errors"].append({
-                        "type": "model_excluded_options", 
-                        "message": f"{model_name} cannot have: {', '.join(conflicting_options)}",
-                        "conflicting_options": conflicting_options
-                    })
+        # All rule families are evaluated against one selection bitmask
+        compiled = self.get_constraint_engine(model_name)
+        selection = self.option_index.selection_mask(configuration)
+        validation_result["errors"] = compiled.errors(configuration, selection)
+        validation_result["errors"].extend(self.seasonal.errors(selection, order_date, production_date))
+        validation_result["valid"] = not validation_result["errors"]
         
         # Add suggestions for popular combinations
         self._add_configuration_suggestions(model_name, configuration, validation_result)
         
         return validation_result
     
+    def start_incremental_validation(self, model_name: str, configuration: Dict[str, Any]) -> Dict[str, Any]:
+        """Full validation keyed by rule id, plus a state token for later delta validation"""
+        state = start_state(self.get_constraint_engine(model_name), self.version, model_name, configuration)
+        return {
+            "token": state.encode(),
+            "valid": not state.errors,
+            "errors": state.errors,
+            "warnings": {}
+        }
+    
+    def validate_delta(self, token: str, option: str, value: Any) -> Dict[str, Any]:
+        """Apply a single option change to a validation state, re-checking only the rules it touches"""
+        def compiled_for(model_name, version):
+            if version != self.version:
+                raise ValueError("Catalog has changed since this token was issued; revalidate the full configuration")
+            return self.get_constraint_engine(model_name)
+        
+        state = ValidationState.decode(token, compiled_for)
+        compiled = self.get_constraint_engine(state.model_name)
+        new_state, changed, resolved = apply_change(compiled, state, option, value)
+        return {
+            "token": new_state.encode(),
+            "valid": not new_state.errors,
+            "errors": {"changed": changed, "resolved": resolved},
+            "warnings": {"changed": {}, "resolved": []}
+        }
+    
     def _add_configuration_suggestions(self, model_name: str, configuration: Dict[str, Any], result: Dict[str, Any]):
         """Add helpful suggestions for configuration optimization"""
         
@@ -725,8 +793,20 @@ class BMWConfiguratorData:
                 "benefit": "Enhanced safety and peace of mind"
             })
     
-    def calculate_total_price(self, model_name: str, configuration: Dict[str, Any]) -> Dict[str, Any]:
-        """Calculate comprehensive pricing breakdown"""
+    def calculate_total_price(self, model_name: str, configuration: Dict[str, Any],
+                              order_date: Optional[date] = None,
+                              production_date: Optional[date] = None) -> Dict[str, Any]:
+        """Calculate comprehensive pricing breakdown
+
+        Options that are out of season on the given dates are left out of the price
+        and listed under unavailable_options.
+        """
+        blocked = self.seasonal.blocked_mask(order_date, production_date)
+        unavailable = []
+        if blocked:
+            unavailable = self.seasonal.unavailable(self.option_index.selection_mask(configuration), blocked)
+            configuration = {key: value for key, value in configuration.items() if key not in unavailable}
+        
         model_data = self.get_model_data(model_name)
         base_price = model_data.get("base_price", 50000)
         
@@ -829,8 +909,8 @@ class BMWConfiguratorData:
                     "category": "Option"
                 })
         
-        # Calculate package discounts
-        package_discount = self._calculate_package_discounts(selected_packages)
+        # Calculate package discounts (every catalog rule in one pass)
+        package_discount, applied_discounts = self.discounts.evaluate(configuration)
         breakdown["package_discount"] = package_discount
         
         # Calculate totals
@@ -842,24 +922,8 @@ class BMWConfiguratorData:
         breakdown["total_msrp"] = breakdown["subtotal"] + breakdown["destination_fee"]
         breakdown["estimated_taxes"] = breakdown["total_msrp"] * 0.08  # 8% estimated tax
         breakdown["estimated_total"] = breakdown["total_msrp"] + breakdown["estimated_taxes"]
+        breakdown["applied_discounts"] = applied_discounts
+        if unavailable:
+            breakdown["unavailable_options"] = unavailable
         
         return breakdown
-    
-    def _calculate_package_discounts(self, selected_packages: List[str]) -> float:
-        """Calculate discounts for package combinations"""
-        discount = 0
-        
-        # Popular package combinations
-        if "Premium_Package" in selected_packages and "Technology_Package" in selected_packages:
-            discount += 500  # $500 discount for popular combo
-        
-        if "M_Sport_Package" in selected_packages and len([p for p in selected_packages if "M_" in p]) >= 2:
-            discount += 300  # Additional M package discount
-        
-        if len(selected_packages) >= 3:
-            discount += 200  # Multi-package discount
-            
-        return discount
-
-# Create global instance
-bmw_data = BMWConfiguratorData()
@@ -1,9 +1,9 @@
-import requests
-from bs4 import BeautifulSoup
 import json
 import time
 import logging
-from bmw_configurator_data import bmw_data
+import weakref
+from catalog_model import CatalogInterner
+from catalog_store import catalog_store, get_catalog
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +13,10 @@ class BMWDataScraper:
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
+        # Formatted options per catalog snapshot; new snapshots are formatted before they go live
+        self._options_views = weakref.WeakKeyDictionary()
+        self._views_for(catalog_store.current)
+        catalog_store.add_warmup(self._views_for)
 
     def get_all_series(self):
         """Get all BMW series data"""
@@ -66,7 +70,7 @@ class BMWDataScraper:
         """Get detailed information for a specific model"""
         try:
             # Get model data from comprehensive dataset
-            model_data = bmw_data.get_model_data(model)
+            model_data = get_catalog().get_model_data(model)
             if not model_data:
                 # Fallback to legacy method
                 return self._get_legacy_model_details(model)
@@ -98,98 +102,112 @@ class BMWDataScraper:
             return {}
 
     def get_options_for_model(self, model):
-        """Get all available options for a specific model"""
-        try:
-            # Get comprehensive options data with constraints
-            options_data = bmw_data.get_available_options(model)
-            if not options_data:
-                # Fallback to legacy method
-                return self._get_legacy_options(model)
-            
-            # Transform data for frontend compatibility
-            formatted_options = {
-                "engines": [
+        """Get all available options for a specific model (precompiled, read-only)"""
+        options_view = self._views_for(get_catalog()).get(model)
+        if options_view is not None:
+            return options_view
+        # Fallback to legacy method
+        return self._get_legacy_options(model)
+
+    def _views_for(self, catalog):
+        """Frontend options views for a catalog snapshot, compiled once per snapshot"""
+        views = self._options_views.get(catalog)
+        if views is None:
+            views = self._options_views[catalog] = self._compile_options_views(catalog)
+        return views
+
+    def _compile_options_views(self, catalog):
+        """Format every model's options for the frontend once, at load time"""
+        views = {}
+        # Models share most option lists, so one interner per catalog stores them once
+        interner = CatalogInterner()
+        for model in catalog.models_data:
+            try:
+                views[model] = interner.freeze(self._format_options(catalog.get_available_options(model)))
+            except Exception as e:
+                logger.error(f"Error compiling options for {model}: {e}")
+        return views
+
+    def _format_options(self, options_data):
+        """Transform catalog options data for frontend compatibility"""
+        return {
+            "engines": [
+                {
+                    "name": engine_data["name"],
+                    "power": "255 hp",  # Would be dynamic in real implementation
+                    "torque": "295 lb-ft",
+                    "price": engine_data["price"],
+                    "fuel_type": "Gasoline" if "Electric" not in engine_code else "Electric",
+                    "code": engine_code
+                }
+                for engine_code, engine_data in options_data.get("engines", {}).items()
+            ],
+            "drivetrains": [
+                {
+                    "name": drivetrain_data["name"],
+                    "price": drivetrain_data["price"],
+                    "code": drivetrain_code
+                }
+                for drivetrain_code, drivetrain_data in options_data.get("drivetrains", {}).items()
+            ],
+            "exterior": {
+                "colors": [
                     {
-                        "name": engine_data["name"],
-                        "power": "255 hp",  # Would be dynamic in real implementation
-                        "torque": "295 lb-ft",
-                        "price": engine_data["price"],
-                        "fuel_type": "Gasoline" if "Electric" not in engine else "Electric",
-                        "code": engine_code
+                        "name": color_name.replace("_", " "),
+                        "code": color_name,
+                        "price": color_data["price"],
+                        "metallic": color_data.get("metallic", False)
                     }
-                    for engine_code, engine_data in options_data.get("engines", {}).items()
+                    for color_name, color_data in options_data.get("exterior_colors", {}).items()
                 ],
-                "drivetrains": [
+                "wheels": [
                     {
-                        "name": drivetrain_data["name"],
-                        "price": drivetrain_data["price"],
-                        "code": drivetrain_code
+                        "name": wheel_name.replace("_", " "),
+                        "price": wheel_data["price"],
+                        "description": f"{wheel_data['size']}\" {wheel_data['style']}",
+                        "code": wheel_name
                     }
-                    for drivetrain_code, drivetrain_data in options_data.get("drivetrains", {}).items()
-                ],
-                "exterior": {
-                    "colors": [
-                        {
-                            "name": color_name.replace("_", " "),
-                            "code": color_name,
-                            "price": color_data["price"],
-                            "metallic": color_data.get("metallic", False)
-                        }
-                        for color_name, color_data in options_data.get("exterior_colors", {}).items()
-                    ],
-                    "wheels": [
-                        {
-                            "name": wheel_name.replace("_", " "),
-                            "price": wheel_data["price"],
-                            "description": f"{wheel_data['size']}\" {wheel_data['style']}",
-                            "code": wheel_name
-                        }
-                        for wheel_name, wheel_data in options_data.get("wheels", {}).items()
-                    ]
-                },
-                "interior": {
-                    "upholstery": [
-                        {
-                            "name": interior_name.replace("_", " "),
-                            "price": interior_data["price"],
-                            "color": "Black",  # Would be dynamic
-                            "material": interior_data.get("material", "Unknown"),
-                            "code": interior_name
-                        }
-                        for interior_name, interior_data in options_data.get("interior", {}).items()
-                    ]
-                },
-                "packages": {
-                    "all_packages": [
-                        {
-                            "name": package_data["name"],
-                            "price": package_data["price"],
-                            "features": package_data["features"],
-                            "description": package_data.get("description", ""),
-                            "code": package_name,
-                            "conflicts_with": package_data.get("conflicts_with", []),
-                            "requires": package_data.get("requires", [])
-                        }
-                        for package_name, package_data in options_data.get("packages", {}).items()
-                    ]
-                },
-                "individual_options": [
+                    for wheel_name, wheel_data in options_data.get("wheels", {}).items()
+                ]
+            },
+            "interior": {
+                "upholstery": [
                     {
-                        "name": option_name.replace("_", " "),
-                        "price": option_data["price"],
-                        "category": "individual",
-                        "code": option_name
+                        "name": interior_name.replace("_", " "),
+                        "price": interior_data["price"],
+                        "color": "Black",  # Would be dynamic
+                        "material": interior_data.get("material", "Unknown"),
+                        "code": interior_name
                     }
-                    for option_name, option_data in options_data.get("individual_options", {}).items()
-                ],
-                "constraints": options_data.get("constraints", {})
-            }
-            
-            return formatted_options
-            
-        except Exception as e:
-            logger.error(f"Error fetching options for {model}: {e}")
-            return {}
+                    for interior_name, interior_data in options_data.get("interior", {}).items()
+                ]
+            },
+            "packages": {
+                "all_packages": [
+                    {
+                        "name": package_data["name"],
+                        "price": package_data["price"],
+                        "features": package_data["features"],
+                        "description": package_data.get("description", ""),
+                        "code": package_name,
+                        "conflicts_with": package_data.get("conflicts_with", []),
+                        "requires": package_data.get("requires", [])
+                    }
+                    for package_name, package_data in options_data.get("packages", {}).items()
+                ]
+            },
+            "individual_options": [
+                {
+                    "name": option_name.replace("_", " "),
+                    "price": option_data["price"],
+                    "category": "individual",
+                    "code": option_name
+                }
+                for option_name, option_data in options_data.get("individual_options", {}).items()
+            ],
+            "constraints": options_data.get("constraints", {}),
+            "seasonal_availability": options_data.get("seasonal_availability", {})
+        }
 
     def _get_base_price(self, model):
         """Get base price for model"""
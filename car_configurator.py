@@ -1,14 +1,21 @@
 import json
 import logging
-from typing import Dict, List, Any
-from bmw_configurator_data import bmw_data
+from datetime import date
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+from catalog_store import get_catalog
+from configuration_optimizer import get_optimizer
+from local_recommender import get_local_recommender
+from result_cache import ResultCache, fingerprint
 
 logger = logging.getLogger(__name__)
 
 class CarConfigurator:
-    def __init__(self):
+    def __init__(self, cache_size: int = 4096):
         self.constraints = self._load_constraints()
         self.pricing = self._load_pricing()
+        # Validation and pricing results by configuration fingerprint (includes the catalog version)
+        self.validation_cache = ResultCache(cache_size)
+        self.price_cache = ResultCache(cache_size)
 
     def _load_constraints(self):
         """Load configuration constraints"""
@@ -50,11 +57,15 @@ class CarConfigurator:
             }
         }
 
-    def validate_configuration(self, model: str, configuration: Dict[str, Any]) -> Dict[str, Any]:
-        """Validate a car configuration for conflicts and constraints"""
+    def validate_configuration(self, model: str, configuration: Dict[str, Any], order_date: Optional[date] = None,
+                               production_date: Optional[date] = None) -> Dict[str, Any]:
+        """Validate a car configuration for conflicts, constraints and seasonal availability"""
         try:
-            # Use comprehensive validation from bmw_data
-            return bmw_data.validate_configuration(model, configuration)
+            # Use comprehensive validation from the catalog, computed once per configuration fingerprint
+            catalog = get_catalog()
+            key = fingerprint(catalog.version, model, configuration, order_date, production_date)
+            return self.validation_cache.get_or_compute(key, lambda: catalog.validate_configuration(
+                model, configuration, order_date, production_date))
 
         except Exception as e:
             logger.error(f"Error validating configuration: {e}")
@@ -65,6 +76,20 @@ class CarConfigurator:
                 "suggestions": []
             }
 
+    def start_incremental_validation(self, model: str, configuration: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate a configuration and return a state token for delta validation"""
+        return get_catalog().start_incremental_validation(model, configuration)
+
+    def validate_delta(self, token: str, option: str, value: Any) -> Dict[str, Any]:
+        """Re-validate only the rules affected by one option change"""
+        return get_catalog().validate_delta(token, option, value)
+
+    def validate_configurations(self, rows: List[Tuple[str, Dict[str, Any]]], order_date: Optional[date] = None,
+                                production_date: Optional[date] = None) -> Iterator[Dict[str, Any]]:
+        """Validate many (model, configuration) rows, yielding results in input order"""
+        from batch_engine import validate_batch  # NumPy is only loaded once a batch endpoint is used
+        return validate_batch(get_catalog(), rows, order_date, production_date)
+
     def _add_warnings_and_suggestions(self, configuration: Dict[str, Any], result: Dict[str, Any]):
         """Add warnings and suggestions to validation result"""
         # Check for common optimizations
@@ -83,29 +108,42 @@ class CarConfigurator:
                 "benefit": "High resale value combination"
             })
 
-    def calculate_price(self, model: str, configuration: Dict[str, Any]) -> Dict[str, Any]:
+    def calculate_price(self, model: str, configuration: Dict[str, Any], order_date: Optional[date] = None,
+                        production_date: Optional[date] = None) -> Dict[str, Any]:
         """Calculate total price for the configuration"""
         try:
-            # Use comprehensive pricing from bmw_data
-            return bmw_data.calculate_total_price(model, configuration)
+            # Use comprehensive pricing from the catalog, computed once per configuration fingerprint
+            catalog = get_catalog()
+            key = fingerprint(catalog.version, model, configuration, order_date, production_date)
+            return self.price_cache.get_or_compute(key, lambda: catalog.calculate_total_price(
+                model, configuration, order_date, production_date))
 
         except Exception as e:
             logger.error(f"Error calculating price: {e}")
             return {"error": "Price calculation failed"}
 
-    def _calculate_package_discounts(self, configuration: Dict[str, Any]) -> float:
-        """Calculate discounts for package combinations"""
-        discount = 0
-        
-        # Premium + Technology package combo discount
-        if configuration.get("premium_package") and configuration.get("technology_package"):
-            discount += 500
-        
-        # M Sport package with performance options
-        if configuration.get("m_sport_package") and configuration.get("performance_tires"):
-            discount += 300
-            
-        return discount
+    def calculate_prices(self, rows: List[Tuple[str, Dict[str, Any]]], order_date: Optional[date] = None,
+                         production_date: Optional[date] = None) -> Iterator[Dict[str, Any]]:
+        """Price many (model, configuration) rows, yielding breakdowns in input order"""
+        from batch_engine import price_batch  # NumPy is only loaded once a batch endpoint is used
+        return price_batch(get_catalog(), rows, order_date, production_date)
+
+    def retain_catalog(self, catalog) -> None:
+        """Drop cached results of every catalog version but this one"""
+        self.validation_cache.retain_version(catalog.version)
+        self.price_cache.retain_version(catalog.version)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters of the validation and pricing caches"""
+        return {"validation": self.validation_cache.stats(), "pricing": self.price_cache.stats()}
+
+    def optimize_configuration(self, model: str, max_price: float, weights: Dict[str, Any]) -> Dict[str, Any]:
+        """Best valid configuration for the preference weights that fits within max_price"""
+        return get_optimizer(get_catalog()).optimize(model, max_price, weights)
+
+    def recommend_configuration(self, model: str, preferences: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Locally scored suggestion for the preference themes; None when the model has no valid configuration"""
+        return get_local_recommender(get_catalog()).suggestion(model, preferences)
 
     def get_recommendations(self, model: str, user_preferences: Dict[str, Any]) -> Dict[str, Any]:
         """Get configuration recommendations based on user preferences"""
@@ -0,0 +1,173 @@
+"""
+BMW Catalog Image
+Single binary file holding a catalog's precompiled batch arrays: the option
+symbol table, the batch price vector and every model's constraint matrices.
+Workers memory-map it read-only, so the arrays live once in the page cache
+and are used in place instead of being rebuilt in every process.
+
+The image is not a catalog source: workers still compile the catalog from its
+snapshot, which is about as fast as anything an image could offer (most of it
+is interning the tables). The image is only opened once a batch endpoint runs,
+and only used when it was exported from that same catalog.
+
+Layout: 8-byte magic, little-endian u32 header length, JSON header
+({format, version, sections: {name: {offset, dtype, shape}}}), then each
+section aligned to SECTION_ALIGNMENT bytes.
+"""
+
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import weakref
+from typing import Dict, List, Any, Optional, Tuple
+
+from bmw_configurator_data import BMWConfiguratorData
+
+logger = logging.getLogger(__name__)
+
+IMAGE_MAGIC = b"BMWCIMG\0"
+IMAGE_FORMAT = 2
+SECTION_ALIGNMENT = 64
+
+# Image shared by the batch endpoints of every worker on the host (unset: build per process)
+CATALOG_IMAGE_PATH = os.environ.get("BMW_CATALOG_IMAGE") or None
+
+_HEADER_LENGTH = struct.Struct("<I")
+
+
+def validator_section(model_name: Optional[str], field: str) -> str:
+    """Section name of one constraint matrix ('' is the base engine for unknown models)"""
+    return f"validator/{model_name or ''}/{field}"
+
+
+def write_image(path: str, catalog: BMWConfiguratorData) -> None:
+    """Compile a catalog into an image file, written atomically (temp file + rename)
+
+    Replacing the file by rename keeps workers that still map the old image valid:
+    their mapping holds the old inode until they switch over.
+    """
+    import numpy as np
+    from batch_engine import BatchPricer, BatchValidator, VALIDATOR_ARRAYS
+
+    arrays: Dict[str, np.ndarray] = {
+        "codes": np.frombuffer("\n".join(catalog.option_index.codes).encode("utf-8"), dtype=np.uint8),
+        "pricer/prices": BatchPricer(catalog).prices,
+    }
+    engines = [(None, catalog.get_constraint_engine(None))]
+    engines.extend((model_name, catalog.get_constraint_engine(model_name)) for model_name in catalog.models_data)
+    for model_name, compiled in engines:
+        validator = BatchValidator(compiled)
+        for field in VALIDATOR_ARRAYS:
+            arrays[validator_section(model_name, field)] = getattr(validator, field)
+
+    # Offsets are relative to the end of the header, so the header can be sized afterwards
+    sections: Dict[str, Dict[str, Any]] = {}
+    payload: List[bytes] = []
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        padding = -offset % SECTION_ALIGNMENT
+        payload.append(b"\0" * padding)
+        offset += padding
+        sections[name] = {"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)}
+        payload.append(array.tobytes())
+        offset += array.nbytes
+
+    header = json.dumps({"format": IMAGE_FORMAT, "version": catalog.version, "sections": sections}).encode("utf-8")
+    prefix = IMAGE_MAGIC + _HEADER_LENGTH.pack(len(header)) + header
+    prefix += b"\0" * (-len(prefix) % SECTION_ALIGNMENT)
+
+    # A temp file of its own, so concurrent exports to the same path never share one
+    handle = tempfile.NamedTemporaryFile(dir=os.path.dirname(path) or ".", prefix=os.path.basename(path),
+                                         suffix=".tmp", delete=False)
+    try:
+        with handle:
+            handle.write(prefix)
+            for chunk in payload:
+                handle.write(chunk)
+        os.replace(handle.name, path)
+    except BaseException:
+        os.unlink(handle.name)
+        raise
+
+
+class CatalogImage:
+    """Read-only memory map of a catalog image; arrays are zero-copy views into it"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as handle:
+            self._buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._buffer[:len(IMAGE_MAGIC)] != IMAGE_MAGIC:
+            raise ValueError(f"{path} is not a catalog image")
+        start = len(IMAGE_MAGIC) + _HEADER_LENGTH.size
+        (header_length,) = _HEADER_LENGTH.unpack_from(self._buffer, len(IMAGE_MAGIC))
+        header = json.loads(self._buffer[start:start + header_length])
+        if header.get("format") != IMAGE_FORMAT:
+            raise ValueError(f"Unsupported catalog image format (expected {IMAGE_FORMAT})")
+        self.version: str = header["version"]
+        self._sections: Dict[str, Dict[str, Any]] = header["sections"]
+        self._data_start = start + header_length + (-(start + header_length) % SECTION_ALIGNMENT)
+
+    def has(self, name: str) -> bool:
+        return name in self._sections
+
+    def array(self, name: str) -> Any:
+        """Read-only NumPy view of a section, backed directly by the mapped file"""
+        import numpy as np  # Opening an image (e.g. to check it matches) does not need NumPy
+        section = self._sections[name]
+        dtype = np.dtype(section["dtype"])
+        shape: Tuple[int, ...] = tuple(section["shape"])
+        count = int(np.prod(shape)) if shape else 1
+        return np.frombuffer(self._buffer, dtype=dtype, count=count,
+                             offset=self._data_start + section["offset"]).reshape(shape)
+
+    def raw(self, name: str) -> bytes:
+        """Contents of a byte section (the code list), read without NumPy"""
+        section = self._sections[name]
+        start = self._data_start + section["offset"]
+        return self._buffer[start:start + section["shape"][0]]
+
+    def option_codes(self) -> List[str]:
+        """Option codes in bit order, as the constraint matrices and price vector were compiled"""
+        codes = self.raw("codes").decode("utf-8")
+        return codes.split("\n") if codes else []
+
+    def validator_arrays(self, model_name: Optional[str]) -> Optional[Dict[str, Any]]:
+        """A model's constraint matrices, or None when the image has none for it"""
+        from batch_engine import VALIDATOR_ARRAYS
+        if not self.has(validator_section(model_name, VALIDATOR_ARRAYS[0])):
+            return None
+        return {field: self.array(validator_section(model_name, field)) for field in VALIDATOR_ARRAYS}
+
+    def matches(self, catalog: BMWConfiguratorData) -> bool:
+        """Whether this image was exported from `catalog` (same data, same option bit order)"""
+        return self.version == catalog.version and self.option_codes() == catalog.option_index.codes
+
+
+_images: "weakref.WeakKeyDictionary[BMWConfiguratorData, Optional[CatalogImage]]" = weakref.WeakKeyDictionary()
+
+
+def get_catalog_image(catalog: BMWConfiguratorData) -> Optional[CatalogImage]:
+    """The configured image if it matches this catalog, else None; opened once per catalog instance
+
+    A stale or unreadable image (e.g. the snapshot was reloaded but the image not re-exported)
+    is logged and ignored, and the batch arrays are built in-process instead.
+    """
+    if catalog in _images:
+        return _images[catalog]
+    image = None
+    if CATALOG_IMAGE_PATH:
+        try:
+            image = CatalogImage(CATALOG_IMAGE_PATH)
+            if not image.matches(catalog):
+                logger.warning(f"Catalog image {CATALOG_IMAGE_PATH} is not catalog {catalog.version}; ignoring it")
+                image = None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring catalog image {CATALOG_IMAGE_PATH}: {e}")
+            image = None
+    _images[catalog] = image
+    return image
@@ -0,0 +1,87 @@
+"""
+BMW Catalog Object Model
+Compact, read-only catalog storage: interned codes, tuple-backed lists
+and shared sub-tables
+"""
+
+import sys
+from typing import Dict, Any, Tuple
+
+
+class FrozenDict(dict):
+    """Read-only dict used for compiled catalog views (still JSON serializable)"""
+
+    __slots__ = ()
+
+    def __new__(cls, *args, **kwargs):
+        # Populate here so a second __init__ call cannot refill the view
+        self = dict.__new__(cls)
+        dict.update(self, *args, **kwargs)
+        return self
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Compiled catalog views are read-only")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+    __ior__ = _readonly
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+
+def freeze(value: Any) -> Any:
+    """Recursively convert dicts/lists into FrozenDict/tuples"""
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+EMPTY_VIEW = FrozenDict()
+
+
+class CatalogInterner:
+    """Freezes catalog values so equal strings, tuples and tables are stored only once
+
+    Strings go through sys.intern; frozen containers are hash-consed, so the
+    colour table copied into every model's options view, or a feature list
+    repeated across packages, is one shared object per catalog.
+    """
+
+    __slots__ = ("_pool",)
+
+    def __init__(self):
+        self._pool: Dict[Tuple, Any] = {}
+
+    def freeze(self, value: Any) -> Any:
+        """Interned, frozen equivalent of value (same result as freeze(), but shared)"""
+        if isinstance(value, str):
+            return sys.intern(value)
+        if isinstance(value, dict):
+            items = tuple((self.freeze(key), self.freeze(item)) for key, item in value.items())
+            key = (FrozenDict, tuple((name, self._key(item)) for name, item in items))
+            frozen = self._pool.get(key)
+            if frozen is None:
+                frozen = self._pool[key] = FrozenDict(items)
+            return frozen
+        if isinstance(value, (list, tuple)):
+            items = tuple(self.freeze(item) for item in value)
+            key = (tuple, tuple(self._key(item) for item in items))
+            frozen = self._pool.get(key)
+            if frozen is None:
+                frozen = self._pool[key] = items
+            return frozen
+        return value
+
+    @staticmethod
+    def _key(value: Any) -> Tuple:
+        # Children are already canonical, so containers compare by identity; the type
+        # keeps True/1/1.0 apart
+        if isinstance(value, (dict, tuple)):
+            return (id(value),)
+        return (type(value), value)
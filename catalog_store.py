@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+BMW Catalog Store
+Loads the catalog from an on-disk snapshot (JSON, or a memory-mapped catalog
+image), watches it for changes and swaps in freshly compiled catalogs
+atomically so requests never see a mix
+"""
+
+import argparse
+import contextvars
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from bmw_configurator_data import BMWConfiguratorData
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 1
+
+# Snapshots with this suffix are binary catalog images (see catalog_image)
+CATALOG_IMAGE_SUFFIX = ".cimg"
+
+# Snapshot pinned for the duration of the current request (see CatalogStore.pin)
+_pinned_catalog: contextvars.ContextVar = contextvars.ContextVar("pinned_catalog", default=None)
+
+
+def read_snapshot(path: str) -> bytes:
+    """Raw snapshot bytes; .gz snapshots are stored compressed"""
+    with open(path, "rb") as handle:
+        raw = handle.read()
+    return gzip.decompress(raw) if path.endswith(".gz") else raw
+
+
+def parse_snapshot(raw: bytes) -> Dict[str, Any]:
+    """Decode snapshot bytes into catalog tables"""
+    snapshot = json.loads(raw.decode("utf-8"))
+    if not isinstance(snapshot, dict) or snapshot.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(f"Unsupported catalog snapshot format (expected {SNAPSHOT_FORMAT})")
+    return snapshot
+
+
+def is_image_path(path: str) -> bool:
+    return path.endswith(CATALOG_IMAGE_SUFFIX)
+
+
+def open_snapshot(path: str) -> Tuple[str, Callable[[], BMWConfiguratorData]]:
+    """Content digest of a snapshot and a loader that compiles it"""
+    if is_image_path(path):
+        raise ValueError(f"{path} is a catalog image; serve its JSON snapshot and set BMW_CATALOG_IMAGE to the image")
+    raw = read_snapshot(path)
+    return hashlib.sha256(raw).hexdigest(), lambda: BMWConfiguratorData(parse_snapshot(raw))
+
+
+def write_snapshot(path: str, catalog: BMWConfiguratorData) -> None:
+    """Write a catalog snapshot atomically (temp file + rename)"""
+    if is_image_path(path):
+        from catalog_image import write_image
+        write_image(path, catalog)
+        return
+    payload = json.dumps({"format": SNAPSHOT_FORMAT, **catalog.to_tables()}, indent=2).encode("utf-8")
+    if path.endswith(".gz"):
+        payload = gzip.compress(payload)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as handle:
+        handle.write(payload)
+    os.replace(temp_path, path)
+
+
+class CatalogStore:
+    """Holds the current compiled catalog and replaces it when its snapshot changes"""
+
+    def __init__(self, path: Optional[str] = None, poll_interval: float = 2.0):
+        self.path = path
+        self.poll_interval = poll_interval
+        self._warmups: List[Callable[[BMWConfiguratorData], Any]] = []
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self._stat_key = None
+        self._digest = None
+        self._current = self._load_initial()
+
+    @property
+    def current(self) -> BMWConfiguratorData:
+        """Latest compiled catalog"""
+        return self._current
+
+    def _load_initial(self) -> BMWConfiguratorData:
+        if not self.path:
+            return BMWConfiguratorData()
+        self._stat_key = self._stat()
+        self._digest, load = open_snapshot(self.path)
+        logger.info(f"Loading catalog snapshot {self.path}")
+        return load()
+
+    def _stat(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def add_warmup(self, warmup: Callable[[BMWConfiguratorData], Any]) -> None:
+        """Run `warmup(catalog)` on every new catalog before it is swapped in"""
+        self._warmups.append(warmup)
+
+    def _warm(self, catalog: BMWConfiguratorData) -> None:
+        # Pinned, so warmups that go through get_catalog() see the catalog being warmed
+        token = _pinned_catalog.set(catalog)
+        try:
+            for warmup in self._warmups:
+                warmup(catalog)
+        finally:
+            _pinned_catalog.reset(token)
+
+    def check_for_update(self) -> bool:
+        """Reload when the snapshot's mtime/size and content hash changed; True if swapped"""
+        if not self.path:
+            return False
+        with self._reload_lock:
+            try:
+                stat_key = self._stat()
+                if stat_key == self._stat_key:
+                    return False
+                # Remember the stat first so a broken file is reported once, not on every poll
+                self._stat_key = stat_key
+                digest, load = open_snapshot(self.path)
+                if digest == self._digest:
+                    return False
+
+                # Compile and warm the new catalog completely before anyone can see it
+                catalog = load()
+                self._warm(catalog)
+            except Exception as e:
+                logger.error(f"Keeping catalog {self._current.version}; failed to load {self.path}: {e}")
+                return False
+
+            self._digest = digest
+            previous, self._current = self._current, catalog
+            logger.info(f"Catalog reloaded: {previous.version} -> {catalog.version}")
+            return True
+
+    def start_watching(self) -> None:
+        """Poll the snapshot in a daemon thread"""
+        if not self.path or self._watcher is not None:
+            return
+        self._watcher = threading.Thread(target=self._watch, name="catalog-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        self._stop.set()
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            self.check_for_update()
+
+    def pin(self) -> contextvars.Token:
+        """Pin the current catalog for this request so every lookup sees the same snapshot"""
+        return _pinned_catalog.set(self._current)
+
+    def unpin(self, token: contextvars.Token) -> None:
+        _pinned_catalog.reset(token)
+
+
+catalog_store = CatalogStore(
+    path=os.environ.get("BMW_CATALOG_PATH") or None,
+    poll_interval=float(os.environ.get("BMW_CATALOG_POLL_SECONDS", 2.0))
+)
+
+
+def get_catalog() -> BMWConfiguratorData:
+    """Catalog pinned for the current request, or the latest one outside requests"""
+    return _pinned_catalog.get() or catalog_store.current
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Export the built-in catalog so it can be edited and served from a snapshot file"""
+    parser = argparse.ArgumentParser(description="BMW catalog snapshot tools")
+    parser.add_argument("command", choices=["export", "check"])
+    parser.add_argument("path", help="Snapshot path (.json or .json.gz; export also writes .cimg catalog images)")
+    parser.add_argument("--source", help="Export this snapshot instead of the built-in catalog "
+                                         "(e.g. compile an edited JSON snapshot into an image)")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        catalog = open_snapshot(args.source)[1]() if args.source else BMWConfiguratorData()
+        write_snapshot(args.path, catalog)
+        print(f"Wrote {args.source or 'built-in catalog'} to {args.path}")
+        return 0
+
+    _, load = open_snapshot(args.path)
+    catalog = load()
+    print(f"{args.path}: {len(catalog.models_data)} models, version {catalog.version}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
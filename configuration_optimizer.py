@@ -0,0 +1,259 @@
+"""
+BMW Configuration Optimizer
+Branch-and-bound search for the highest-scoring valid configuration that
+fits a budget, scored against the preference themes used by the AI assistant
+"""
+
+import weakref
+from typing import Dict, List, Any, Optional, Tuple
+
+from configuration_space import ConfigurationSpace
+
+# The six themes detected by analyze_user_preferences
+THEMES = ("budget_conscious", "performance_oriented", "luxury_oriented",
+          "tech_savvy", "family_oriented", "eco_conscious")
+
+# How strongly each option speaks to each theme (budget is scored from price instead)
+OPTION_THEMES: Dict[str, Dict[str, float]] = {
+    # Engines
+    "B48_2_0T": {"eco_conscious": 1.0},
+    "B58_3_0T": {"performance_oriented": 2.0, "luxury_oriented": 1.0},
+    "N63_4_4T_V8": {"performance_oriented": 3.0, "luxury_oriented": 2.0},
+    "S63_4_4T_V8": {"performance_oriented": 4.0, "luxury_oriented": 1.0},
+    "S58_3_0T": {"performance_oriented": 3.5},
+    "Electric_Single_Motor": {"eco_conscious": 3.0, "tech_savvy": 1.0},
+    "Electric_Dual_Motor": {"eco_conscious": 3.0, "performance_oriented": 2.0, "tech_savvy": 1.0},
+    # Drivetrains
+    "RWD": {"performance_oriented": 1.0},
+    "xDrive": {"family_oriented": 2.0, "performance_oriented": 0.5},
+    "AWD": {"family_oriented": 2.0},
+    # Exterior colors
+    "Alpine_White": {"family_oriented": 0.5},
+    "Jet_Black": {"luxury_oriented": 1.0},
+    "Mineral_Grey": {"tech_savvy": 0.5},
+    "Storm_Bay": {"luxury_oriented": 0.5},
+    "Phytonic_Blue": {"performance_oriented": 0.5},
+    "Mineral_White": {"luxury_oriented": 0.5},
+    "Barcelona_Blue": {"performance_oriented": 0.5},
+    "Sunset_Orange": {"performance_oriented": 1.0},
+    "Individual_Paint": {"luxury_oriented": 2.0},
+    # Wheels
+    "17_Inch_Style_512": {"eco_conscious": 1.0, "family_oriented": 0.5},
+    "18_Inch_Style_848M": {"performance_oriented": 1.0},
+    "19_Inch_Style_849M": {"performance_oriented": 1.5, "luxury_oriented": 0.5},
+    "20_Inch_Style_850M": {"performance_oriented": 2.0, "luxury_oriented": 1.0},
+    "21_Inch_Individual": {"luxury_oriented": 2.0, "performance_oriented": 1.0},
+    # Interiors
+    "Sensatec_Black": {"family_oriented": 1.0, "eco_conscious": 0.5},
+    "Dakota_Black": {"luxury_oriented": 1.0},
+    "Dakota_Cognac": {"luxury_oriented": 1.2},
+    "Vernasca_Black": {"luxury_oriented": 1.5},
+    "Vernasca_Cognac": {"luxury_oriented": 1.6},
+    "Merino_Individual": {"luxury_oriented": 3.0},
+    "Full_Merino": {"luxury_oriented": 3.5},
+    # Packages
+    "Premium_Package": {"luxury_oriented": 2.0, "tech_savvy": 0.5},
+    "Technology_Package": {"tech_savvy": 3.0},
+    "M_Sport_Package": {"performance_oriented": 3.0},
+    "Executive_Package": {"luxury_oriented": 3.0},
+    "Driver_Assistance_Package": {"family_oriented": 2.5, "tech_savvy": 1.0},
+    "Driver_Assistance_Professional": {"tech_savvy": 2.0, "family_oriented": 1.5},
+    "Cold_Weather_Package": {"family_oriented": 1.0, "luxury_oriented": 0.5},
+    "Convenience_Package": {"family_oriented": 2.0},
+    # Individual options
+    "Sunroof": {"luxury_oriented": 1.0, "family_oriented": 0.5},
+    "Head_Up_Display": {"tech_savvy": 2.0, "performance_oriented": 0.5},
+    "Harman_Kardon_Audio": {"luxury_oriented": 1.0, "tech_savvy": 0.5},
+    "Bowers_Wilkins_Audio": {"luxury_oriented": 2.5, "tech_savvy": 0.5},
+    "Adaptive_LED_Headlights": {"tech_savvy": 1.0, "family_oriented": 1.0},
+    "Laser_Headlights": {"tech_savvy": 2.0, "performance_oriented": 0.5},
+    "Park_Distance_Control": {"family_oriented": 1.5},
+    "Surround_View_Camera": {"family_oriented": 2.0, "tech_savvy": 1.0},
+    "Wireless_Charging": {"tech_savvy": 1.5},
+    "Remote_Start": {"family_oriented": 0.5, "luxury_oriented": 0.5},
+    "Apple_CarPlay": {"tech_savvy": 1.0},
+    "Android_Auto": {"tech_savvy": 1.0},
+    "Gesture_Control": {"tech_savvy": 1.5},
+    "Massaging_Seats": {"luxury_oriented": 2.0},
+    "Ventilated_Seats": {"luxury_oriented": 1.5},
+    "Carbon_Fiber_Trim": {"performance_oriented": 1.5, "luxury_oriented": 0.5},
+    "Sport_Exhaust": {"performance_oriented": 2.0},
+    "M_Performance_Exhaust": {"performance_oriented": 3.0},
+}
+
+# Score lost per $1,000 of option cost for each unit of budget weight
+BUDGET_PENALTY_PER_1000 = 1.0
+
+# Safety valve for pathological catalogs; the best configuration found so far is returned
+DEFAULT_MAX_NODES = 200000
+
+# (pricing table, configuration key) for single-value selections
+SLOT_TABLES = (("exterior_colors", "exterior_color"), ("wheel_options", "wheels"),
+               ("interior_options", "interior"))
+
+
+def normalize_weights(weights: Dict[str, Any]) -> Dict[str, float]:
+    """Theme weights as floats; booleans from analyze_user_preferences count as 1.0"""
+    unknown = set(weights) - set(THEMES)
+    if unknown:
+        raise ValueError(f"Unknown preference themes: {', '.join(sorted(unknown))}")
+    return {theme: float(weights.get(theme, 0) or 0) for theme in THEMES}
+
+
+class ConfigurationOptimizer:
+    """Budget-constrained best configuration search over one catalog"""
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self._spaces: Dict[str, ConfigurationSpace] = {}
+
+    def get_space(self, model_name: str) -> ConfigurationSpace:
+        space = self._spaces.get(model_name)
+        if space is None:
+            space = self._spaces[model_name] = ConfigurationSpace(self.catalog, model_name)
+        return space
+
+    def option_price(self, code: str) -> int:
+        """Price calculate_total_price charges for a selected package/option key"""
+        pricing = self.catalog.pricing
+        price = 0
+        if code.endswith("_Package") and code in pricing["packages"]:
+            price += pricing["packages"][code]["price"]
+        if code in pricing["individual_options"]:
+            price += pricing["individual_options"][code]["price"]
+        return price
+
+    def score(self, codes: List[str], price: float, weights: Dict[str, float],
+              bonuses: Optional[Dict[str, float]] = None) -> float:
+        """Theme score of a set of selected codes at a given price, plus any flat per-code bonuses"""
+        total = 0.0
+        for code in codes:
+            for theme, affinity in OPTION_THEMES.get(code, {}).items():
+                total += weights[theme] * affinity
+            if bonuses:
+                total += bonuses.get(code, 0.0)
+        return total - weights["budget_conscious"] * BUDGET_PENALTY_PER_1000 * price / 1000
+
+    def decision_groups(self, space: ConfigurationSpace, weights: Dict[str, float],
+                        bonuses: Optional[Dict[str, float]] = None) -> List[List[Tuple[float, int, Dict[str, Any]]]]:
+        """One group per decision; exactly one (score, price, assignment) choice is taken from each"""
+        pricing = self.catalog.pricing
+        groups = []
+
+        pairs = []
+        for engine, drivetrain in space.pairs:
+            price = pricing["engines"][engine]["price"] + pricing["drivetrains"][drivetrain]["price"]
+            pairs.append((self.score([engine, drivetrain], price, weights, bonuses), price,
+                          {"engine": engine, "drivetrain": drivetrain}))
+        groups.append(pairs)
+
+        for (table, key), codes in zip(SLOT_TABLES, (space.colors, space.wheels, space.interiors)):
+            choices = []
+            for code in codes:
+                price = pricing[table][code]["price"]
+                choices.append((self.score([code], price, weights, bonuses), price, {key: code}))
+            groups.append(choices)
+
+        for _, solutions in space.components:
+            choices = []
+            for codes in solutions:
+                price = sum(self.option_price(code) for code in codes)
+                choices.append((self.score(list(codes), price, weights, bonuses), price, dict.fromkeys(codes, True)))
+            groups.append(choices)
+
+        for code in space.free:
+            price = self.option_price(code)
+            groups.append([(0.0, 0, {}), (self.score([code], price, weights, bonuses), price, {code: True})])
+
+        for choices in groups:
+            # Best score first, cheaper first on ties
+            choices.sort(key=lambda choice: (-choice[0], choice[1]))
+        # Decide the groups with the widest score spread first
+        groups.sort(key=lambda choices: -(choices[0][0] - choices[-1][0]) if choices else 0)
+        return groups
+
+    def optimize(self, model_name: str, max_price: float, weights: Dict[str, Any],
+                 max_nodes: int = DEFAULT_MAX_NODES) -> Dict[str, Any]:
+        """Highest-scoring valid configuration whose total MSRP is within max_price"""
+        weights = normalize_weights(weights)
+        space = self.get_space(model_name)
+        groups = self.decision_groups(space, weights)
+        if any(not choices for choices in groups):
+            return {"model": model_name, "found": False, "reason": "Model has no valid configurations"}
+
+        # Fixed part of the MSRP (base price + destination) and the most any discount combo can save
+        # (rules only add up as more options are selected, so selecting every known option gives the max)
+        fixed_price = self.catalog.calculate_total_price(model_name, {})["total_msrp"]
+        everything = dict.fromkeys([*self.catalog.pricing["packages"], *self.catalog.option_index.codes], True)
+        max_discount = self.catalog.calculate_total_price(model_name, everything)["package_discount"]
+
+        min_prices = [min(price for _, price, _ in choices) for choices in groups]
+        min_price_after = [0] * (len(groups) + 1)
+        for position in range(len(groups) - 1, -1, -1):
+            min_price_after[position] = min_price_after[position + 1] + min_prices[position]
+
+        best = {"score": float("-inf"), "configuration": None, "breakdown": None}
+        nodes = 0
+        chosen: List[Dict[str, Any]] = []
+
+        def upper_bound(position: int, slack: float) -> float:
+            """Best score still reachable, allowing each remaining group any choice that fits the slack"""
+            bound = 0.0
+            for group, choices in enumerate(groups[position:], start=position):
+                floor = min_prices[group]
+                bound += max(score for score, price, _ in choices if price - floor <= slack)
+            return bound
+
+        def search(position: int, score: float, price: float) -> None:
+            nonlocal nodes
+            nodes += 1
+            slack = max_price - (fixed_price + price + min_price_after[position] - max_discount)
+            if slack < 0 or nodes > max_nodes:
+                return
+            if score + upper_bound(position, slack) <= best["score"]:
+                return
+            if position == len(groups):
+                configuration = {}
+                for assignment in chosen:
+                    configuration.update(assignment)
+                breakdown = self.catalog.calculate_total_price(model_name, configuration)
+                if breakdown["total_msrp"] <= max_price:
+                    best.update(score=score, configuration=configuration, breakdown=breakdown)
+                return
+            for choice_score, choice_price, assignment in groups[position]:
+                chosen.append(assignment)
+                search(position + 1, score + choice_score, price + choice_price)
+                chosen.pop()
+
+        search(0, 0.0, 0)
+
+        if best["configuration"] is None:
+            return {
+                "model": model_name,
+                "found": False,
+                "reason": f"No valid configuration fits a ${max_price:,.0f} budget",
+                "nodes_explored": nodes,
+                "optimal": nodes <= max_nodes
+            }
+        return {
+            "model": model_name,
+            "found": True,
+            "configuration": best["configuration"],
+            "score": round(best["score"], 4),
+            "weights": weights,
+            "price_breakdown": best["breakdown"],
+            "validation": self.catalog.validate_configuration(model_name, best["configuration"]),
+            "nodes_explored": nodes,
+            "optimal": nodes <= max_nodes
+        }
+
+
+_optimizers: "weakref.WeakKeyDictionary[Any, ConfigurationOptimizer]" = weakref.WeakKeyDictionary()
+
+
+def get_optimizer(catalog) -> ConfigurationOptimizer:
+    """Optimizer for a catalog, built once per catalog instance"""
+    optimizer = _optimizers.get(catalog)
+    if optimizer is None:
+        optimizer = _optimizers[catalog] = ConfigurationOptimizer(catalog)
+    return optimizer
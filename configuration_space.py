@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+BMW Configuration Space
+Enumerates and counts every valid configuration of a model by propagating
+the compiled constraints instead of validating the full Cartesian product
+"""
+
+import argparse
+import itertools
+import json
+import sys
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+
+from catalog_store import get_catalog
+
+# Normalized rule kinds, all expressed over OptionIndex bitmasks
+AT_MOST_ONE = "at_most_one"   # (mask,)                    popcount(selection & mask) <= 1
+IMPLIES = "implies"           # (trigger_mask, required)   trigger selected -> all required selected
+MUST = "must"                 # (mask,)                    all selected
+FORBID = "forbid"             # (mask,)                    none selected
+
+
+def normalize_rules(compiled) -> List[Tuple]:
+    """Express every key-based rule family of a CompiledConstraints as a normalized clause"""
+    rules = [(AT_MOST_ONE, mask) for mask, _ in compiled.incompatible_rules]
+    rules.extend((IMPLIES, base_mask, required_mask) for base_mask, required_mask, _ in compiled.required_rules)
+    rules.extend((IMPLIES, 1 << bit, required_mask) for bit, required_mask, _, _ in compiled.package_rules)
+    if compiled.model_required_mask:
+        rules.append((MUST, compiled.model_required_mask))
+    if compiled.model_excluded_mask:
+        rules.append((FORBID, compiled.model_excluded_mask))
+    return rules
+
+
+def rule_mask(rule: Tuple) -> int:
+    """Every bit a rule mentions"""
+    mask = 0
+    for part in rule[1:]:
+        mask |= part
+    return mask
+
+
+def violated(rule: Tuple, included: int, excluded: int) -> bool:
+    """Whether a rule is already broken by the decided options"""
+    kind = rule[0]
+    if kind == AT_MOST_ONE:
+        hit = included & rule[1]
+        return bool(hit & (hit - 1))
+    if kind == IMPLIES:
+        return bool(included & rule[1] and excluded & rule[2])
+    if kind == MUST:
+        return bool(excluded & rule[1])
+    return bool(included & rule[1])
+
+
+def propagate(rules: List[Tuple], included: int, excluded: int) -> Optional[Tuple[int, int]]:
+    """Unit-propagate forced choices to a fixpoint; None when a rule can no longer hold"""
+    changed = True
+    while changed:
+        changed = False
+        for rule in rules:
+            if violated(rule, included, excluded):
+                return None
+            kind = rule[0]
+            new_included, new_excluded = included, excluded
+            if kind == AT_MOST_ONE:
+                if included & rule[1]:
+                    new_excluded |= rule[1] & ~included
+            elif kind == IMPLIES:
+                if included & rule[1]:
+                    new_included |= rule[2]
+                if excluded & rule[2]:
+                    new_excluded |= rule[1]
+            elif kind == MUST:
+                new_included |= rule[1]
+            else:
+                new_excluded |= rule[1]
+            if new_included & new_excluded:
+                return None
+            if (new_included, new_excluded) != (included, excluded):
+                included, excluded = new_included, new_excluded
+                changed = True
+    return included, excluded
+
+
+def solve(rules: List[Tuple], variables: List[int], included: int, excluded: int) -> Iterator[int]:
+    """Yield the included mask of every assignment of `variables` that satisfies `rules`"""
+    state = propagate(rules, included, excluded)
+    if state is None:
+        return
+    included, excluded = state
+    decided = included | excluded
+    for bit in variables:
+        if not decided >> bit & 1:
+            yield from solve(rules, variables, included | 1 << bit, excluded)
+            yield from solve(rules, variables, included, excluded | 1 << bit)
+            return
+    yield included
+
+
+class ConfigurationSpace:
+    """Valid configurations of one model, factored into independent parts
+
+    Engine/drivetrain pairs, colors, wheels and interiors are single-value
+    slots. Package and option keys are split into free keys (no rule mentions
+    them) and connected components of keys linked by rules; each component is
+    solved on its own with propagation, so the total is an exact product.
+    """
+
+    def __init__(self, catalog, model_name: str):
+        self.model_name = model_name
+        options = catalog.get_available_options(model_name)
+        compiled = catalog.get_constraint_engine(model_name)
+        index = compiled.index
+
+        self.engines = list(options.get("engines", {}))
+        self.drivetrains = list(options.get("drivetrains", {}))
+        self.pairs = [
+            (engine, drivetrain)
+            for engine in self.engines
+            for drivetrain in self.drivetrains
+            if compiled.drivetrain_error(engine, drivetrain) is None
+        ]
+        self.colors = list(options.get("exterior_colors", {}))
+        self.wheels = list(options.get("wheels", {}))
+        self.interiors = list(options.get("interior", {}))
+        self.selectable = list(dict.fromkeys(
+            [*options.get("packages", {}), *options.get("individual_options", {})]))
+
+        rules = normalize_rules(compiled)
+        mentioned = 0
+        for rule in rules:
+            mentioned |= rule_mask(rule)
+        selectable_mask = 0
+        for code in self.selectable:
+            bit = index.get(code)
+            if bit is not None:
+                selectable_mask |= 1 << bit
+        self.free = [code for code in self.selectable
+                     if index.get(code) is None or not mentioned >> index.get(code) & 1]
+
+        # Options no one can pick are decided up front: they are never selected
+        self.unselectable = mentioned & ~selectable_mask
+        self.components = self._solve_components(rules, mentioned & selectable_mask, index)
+
+    def _solve_components(self, rules: List[Tuple], variables_mask: int, index) -> List[Tuple[List[str], List[Tuple[str, ...]]]]:
+        """Solve each group of rule-linked keys independently"""
+        parent = {}
+
+        def find(bit):
+            while parent.setdefault(bit, bit) != bit:
+                parent[bit] = parent[parent[bit]]
+                bit = parent[bit]
+            return bit
+
+        def bits_of(mask):
+            return [bit for bit in range(mask.bit_length()) if mask >> bit & 1]
+
+        for bit in bits_of(variables_mask):
+            find(bit)
+        grouped_rules: Dict[Any, List[Tuple]] = {}
+        for rule in rules:
+            rule_bits = bits_of(rule_mask(rule) & variables_mask)
+            for bit in rule_bits[1:]:
+                parent[find(bit)] = find(rule_bits[0])
+            # Rules over unselectable options only must hold on their own
+            grouped_rules.setdefault(rule_bits[0] if rule_bits else None, []).append(rule)
+
+        constant_rules = grouped_rules.pop(None, [])
+        if propagate(constant_rules, 0, self.unselectable) is None:
+            return [([], [])]
+
+        by_root: Dict[int, List[Tuple]] = {}
+        for first_bit, component_rules in grouped_rules.items():
+            by_root.setdefault(find(first_bit), []).extend(component_rules)
+
+        components = []
+        for root, component_rules in by_root.items():
+            variables = [bit for bit in parent if find(bit) == root]
+            codes = [index.codes[bit] for bit in variables]
+            solutions = [
+                tuple(index.codes[bit] for bit in variables if included >> bit & 1)
+                for included in solve(component_rules, variables, 0, self.unselectable)
+            ]
+            components.append((codes, solutions))
+        return components
+
+    def count(self) -> int:
+        """Exact number of valid configurations"""
+        total = len(self.pairs) * len(self.colors) * len(self.wheels) * len(self.interiors)
+        for _, solutions in self.components:
+            total *= len(solutions)
+        return total * 2 ** len(self.free)
+
+    def dead_options(self) -> List[str]:
+        """Engines, drivetrains and options that appear in no valid configuration"""
+        if not self.count():
+            return [*self.engines, *self.drivetrains, *self.selectable]
+        dead = [engine for engine in self.engines if engine not in {e for e, _ in self.pairs}]
+        dead.extend(drivetrain for drivetrain in self.drivetrains if drivetrain not in {d for _, d in self.pairs})
+        for codes, solutions in self.components:
+            used = set(itertools.chain.from_iterable(solutions))
+            dead.extend(code for code in codes if code not in used)
+        return dead
+
+    def summary(self) -> Dict[str, Any]:
+        """Counts per factor, the exact total and dead options"""
+        return {
+            "model": self.model_name,
+            "total": self.count(),
+            "engine_drivetrain_pairs": len(self.pairs),
+            "exterior_colors": len(self.colors),
+            "wheels": len(self.wheels),
+            "interiors": len(self.interiors),
+            "constrained_option_sets": [len(solutions) for _, solutions in self.components],
+            "free_options": len(self.free),
+            "dead_options": self.dead_options()
+        }
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Lazily yield every valid configuration as a configuration dict"""
+        component_solutions = [solutions for _, solutions in self.components]
+        free_subsets = itertools.product((False, True), repeat=len(self.free))
+        for (engine, drivetrain), color, wheels, interior, chosen, free_flags in itertools.product(
+                self.pairs, self.colors, self.wheels, self.interiors,
+                itertools.product(*component_solutions), free_subsets):
+            configuration = {
+                "engine": engine,
+                "drivetrain": drivetrain,
+                "exterior_color": color,
+                "wheels": wheels,
+                "interior": interior
+            }
+            for codes in chosen:
+                for code in codes:
+                    configuration[code] = True
+            for code, selected in zip(self.free, free_flags):
+                if selected:
+                    configuration[code] = True
+            yield configuration
+
+
+def enumerate_configurations(model_name: str, catalog=None) -> Iterator[Dict[str, Any]]:
+    """Generator over every valid configuration of a model"""
+    return iter(ConfigurationSpace(catalog or get_catalog(), model_name))
+
+
+def count_configurations(catalog=None) -> Dict[str, Dict[str, Any]]:
+    """Exact valid-configuration counts for every model in the catalog"""
+    catalog = catalog or get_catalog()
+    return {model_name: ConfigurationSpace(catalog, model_name).summary()
+            for model_name in catalog.models_data}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Offline CLI: print counts per model or stream configurations as JSON lines"""
+    parser = argparse.ArgumentParser(description="Enumerate valid BMW configurations")
+    parser.add_argument("model", nargs="?", help="Model to enumerate (default: count every model)")
+    parser.add_argument("--limit", type=int, default=None, help="Stop after this many configurations")
+    parser.add_argument("--count", action="store_true", help="Only print the exact count summary")
+    args = parser.parse_args(argv)
+
+    if not args.model:
+        for model_name, summary in count_configurations().items():
+            print(f"{model_name:<10} {summary['total']:>16,}  dead: {', '.join(summary['dead_options']) or '-'}")
+        return 0
+
+    catalog = get_catalog()
+    if args.model not in catalog.models_data:
+        print(f"Unknown model: {args.model}", file=sys.stderr)
+        return 1
+
+    space = ConfigurationSpace(catalog, args.model)
+    if args.count:
+        print(json.dumps(space.summary(), indent=2))
+        return 0
+
+    for configuration in itertools.islice(space, args.limit):
+        print(json.dumps(configuration))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
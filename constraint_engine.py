@@ -0,0 +1,448 @@
+"""
+Bitset-compiled constraint engine
+Interns every option code to an integer bit and compiles the rule families
+from BMWConfiguratorData into masks so validation is a few AND/OR operations
+"""
+
+import base64
+import calendar
+import json
+from datetime import date
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+ENGINE_DRIVETRAIN_RULE = "engine_drivetrain"
+MODEL_REQUIRED_RULE = "model_required"
+MODEL_EXCLUDED_RULE = "model_excluded"
+
+MONTHS = tuple(range(1, 13))
+
+
+class OptionIndex:
+    """Catalog-wide symbol table mapping option codes to bit positions"""
+
+    __slots__ = ("codes", "_bits")
+
+    def __init__(self, codes: Iterable[str] = ()):
+        self.codes: List[str] = []
+        self._bits: Dict[str, int] = {}
+        for code in codes:
+            self.intern(code)
+
+    def intern(self, code: str) -> int:
+        """Return the bit position for a code, allocating one if needed"""
+        bit = self._bits.get(code)
+        if bit is None:
+            bit = len(self.codes)
+            self._bits[code] = bit
+            self.codes.append(code)
+        return bit
+
+    def get(self, code: str) -> Optional[int]:
+        return self._bits.get(code)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def mask_of(self, codes: Iterable[str]) -> int:
+        """OR together the bits of the given codes"""
+        mask = 0
+        for code in codes:
+            mask |= 1 << self.intern(code)
+        return mask
+
+    def codes_in(self, mask: int, ordered: Iterable[str]) -> List[str]:
+        """Codes from `ordered` whose bits are set in mask, keeping that order"""
+        bits = self._bits
+        return [code for code in ordered if code in bits and mask >> bits[code] & 1]
+
+    def selection_mask(self, configuration: Dict[str, Any]) -> int:
+        """Mask of every interned option that is selected (truthy) in a configuration"""
+        bits = self._bits
+        mask = 0
+        for key, value in configuration.items():
+            if value:
+                bit = bits.get(key)
+                if bit is not None:
+                    mask |= 1 << bit
+        return mask
+
+
+def collect_rule_codes(constraints: Dict[str, Any]) -> List[str]:
+    """Every option code mentioned by a model constraints view"""
+    codes = []
+    for engine, drivetrains in constraints.get("engine_drivetrain", {}).items():
+        codes.append(engine)
+        codes.extend(drivetrains)
+    for package, required in constraints.get("package_dependencies", {}).items():
+        codes.append(package)
+        codes.extend(required)
+    for constraint in constraints.get("incompatible_options", []):
+        codes.extend(constraint["options"])
+    for requirement in constraints.get("required_combinations", []):
+        codes.append(requirement["base"])
+        codes.extend(requirement["requires"])
+    model_constraints = constraints.get("model_specific", {})
+    codes.extend(model_constraints.get("required_options", []))
+    codes.extend(model_constraints.get("excluded_options", []))
+    return codes
+
+
+class CompiledConstraints:
+    """One model's rule families compiled to (mask, rule) pairs over an OptionIndex"""
+
+    def __init__(self, model_name: Optional[str], constraints: Dict[str, Any], index: OptionIndex):
+        self.model_name = model_name
+        self.index = index
+        self.engine_drivetrain = constraints["engine_drivetrain"]
+
+        # Engine -> mask of compatible drivetrains (drivetrains are values, not keys)
+        self.drivetrain_masks = {
+            engine: index.mask_of(drivetrains)
+            for engine, drivetrains in self.engine_drivetrain.items()
+        }
+
+        # Only selected "*_Package" keys trigger dependency checks
+        self.package_rules = [
+            (index.intern(package), index.mask_of(required), package, required)
+            for package, required in constraints["package_dependencies"].items()
+            if package.endswith("_Package")
+        ]
+        self.package_trigger_mask = 0
+        for bit, _, _, _ in self.package_rules:
+            self.package_trigger_mask |= 1 << bit
+
+        self.incompatible_rules = [
+            (index.mask_of(constraint["options"]), constraint)
+            for constraint in constraints["incompatible_options"]
+        ]
+
+        self.required_rules = [
+            (1 << index.intern(requirement["base"]), index.mask_of(requirement["requires"]), requirement)
+            for requirement in constraints["required_combinations"]
+        ]
+
+        model_constraints = constraints.get("model_specific", {})
+        self.model_required = tuple(model_constraints.get("required_options", ()))
+        self.model_excluded = tuple(model_constraints.get("excluded_options", ()))
+        self.model_required_mask = index.mask_of(self.model_required)
+        self.model_excluded_mask = index.mask_of(self.model_excluded)
+
+        self.reverse_index = self._build_reverse_index()
+
+    def _rule_masks(self) -> Iterable[Tuple[str, int]]:
+        """(rule id, mask of every option the rule mentions) for each key-based rule"""
+        for position, (bit, required_mask, _, _) in enumerate(self.package_rules):
+            yield f"package:{position}", 1 << bit | required_mask
+        for position, (mask, _) in enumerate(self.incompatible_rules):
+            yield f"incompatible:{position}", mask
+        for position, (base_mask, required_mask, _) in enumerate(self.required_rules):
+            yield f"required:{position}", base_mask | required_mask
+        if self.model_required_mask:
+            yield MODEL_REQUIRED_RULE, self.model_required_mask
+        if self.model_excluded_mask:
+            yield MODEL_EXCLUDED_RULE, self.model_excluded_mask
+
+    def _build_reverse_index(self) -> Dict[str, Tuple[str, ...]]:
+        """Option code -> ids of the rules that mention it"""
+        reverse: Dict[str, List[str]] = {}
+        for rule_id, mask in self._rule_masks():
+            for code in self.index.codes_in(mask, self.index.codes):
+                reverse.setdefault(code, []).append(rule_id)
+        reverse["engine"] = reverse["drivetrain"] = [ENGINE_DRIVETRAIN_RULE]
+        return {code: tuple(rule_ids) for code, rule_ids in reverse.items()}
+
+    @property
+    def rule_ids(self) -> List[str]:
+        return [ENGINE_DRIVETRAIN_RULE, *(rule_id for rule_id, _ in self._rule_masks())]
+
+    def check_rule(self, rule_id: str, selection: int, engine: Any, drivetrain: Any) -> Optional[Dict[str, Any]]:
+        """Evaluate a single rule against a selection mask; the error it raises, if any"""
+        if rule_id == ENGINE_DRIVETRAIN_RULE:
+            return self.drivetrain_error(engine, drivetrain)
+        if rule_id == MODEL_REQUIRED_RULE:
+            return self.model_required_error(selection)
+        if rule_id == MODEL_EXCLUDED_RULE:
+            return self.model_excluded_error(selection)
+        family, _, position = rule_id.partition(":")
+        if family == "package":
+            return self.package_error(self.package_rules[int(position)], selection)
+        if family == "incompatible":
+            return self.incompatible_error(self.incompatible_rules[int(position)], selection)
+        if family == "required":
+            return self.required_error(self.required_rules[int(position)], selection)
+        raise KeyError(rule_id)
+
+    def drivetrain_error(self, selected_engine: Any, selected_drivetrain: Any) -> Optional[Dict[str, Any]]:
+        """Engine/drivetrain compatibility error, if any"""
+        if not (selected_engine and selected_drivetrain):
+            return None
+        bit = self.index.get(selected_drivetrain)
+        if bit is not None and self.drivetrain_masks.get(selected_engine, 0) >> bit & 1:
+            return None
+        return {
+            "type": "engine_drivetrain_incompatible",
+            "message": f"Engine {selected_engine} is not compatible with {selected_drivetrain}",
+            "available_drivetrains": list(self.engine_drivetrain.get(selected_engine, []))
+        }
+
+    def package_error(self, rule: Tuple, selection: int) -> Optional[Dict[str, Any]]:
+        """Missing dependency error for one selected package"""
+        bit, required_mask, package, required = rule
+        if not (selection >> bit & 1 and selection & required_mask != required_mask):
+            return None
+        missing_packages = self.index.codes_in(~selection, required)
+        return {
+            "type": "missing_required_packages",
+            "message": f"Package {package} requires: {', '.join(missing_packages)}",
+            "missing_packages": missing_packages
+        }
+
+    def package_errors(self, selection: int, configuration: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Missing package dependency errors, in configuration order"""
+        if not selection & self.package_trigger_mask:
+            return []
+        failed = {}
+        for rule in self.package_rules:
+            error = self.package_error(rule, selection)
+            if error:
+                failed[rule[2]] = error
+        return [failed[package] for package in configuration if package in failed]
+
+    def incompatible_error(self, rule: Tuple, selection: int) -> Optional[Dict[str, Any]]:
+        """Error when more than one option of an incompatibility rule is selected"""
+        mask, constraint = rule
+        hit = selection & mask
+        if not hit & (hit - 1):
+            return None
+        conflicting_options = self.index.codes_in(selection, constraint["options"])
+        return {
+            "type": "incompatible_options",
+            "message": f"Cannot select {' and '.join(conflicting_options)}: {constraint['reason']}",
+            "conflicting_options": conflicting_options
+        }
+
+    def incompatible_errors(self, selection: int) -> List[Dict[str, Any]]:
+        """Errors for rules with more than one of their options selected"""
+        errors = []
+        for rule in self.incompatible_rules:
+            error = self.incompatible_error(rule, selection)
+            if error:
+                errors.append(error)
+        return errors
+
+    def required_error(self, rule: Tuple, selection: int) -> Optional[Dict[str, Any]]:
+        """Error when a selected base option is missing its required options"""
+        base_mask, required_mask, requirement = rule
+        if not (selection & base_mask and selection & required_mask != required_mask):
+            return None
+        missing_required = self.index.codes_in(~selection, requirement["requires"])
+        return {
+            "type": "missing_required_options",
+            "message": f"{requirement['base']} requires: {', '.join(missing_required)}",
+            "missing_options": missing_required,
+            "reason": requirement["reason"]
+        }
+
+    def required_errors(self, selection: int) -> List[Dict[str, Any]]:
+        """Errors for selected base options missing their required options"""
+        errors = []
+        for rule in self.required_rules:
+            error = self.required_error(rule, selection)
+            if error:
+                errors.append(error)
+        return errors
+
+    def model_required_error(self, selection: int) -> Optional[Dict[str, Any]]:
+        """Error when options this model requires are not selected"""
+        if selection & self.model_required_mask == self.model_required_mask:
+            return None
+        missing_required = self.index.codes_in(~selection, self.model_required)
+        return {
+            "type": "model_required_options",
+            "message": f"{self.model_name} requires: {', '.join(missing_required)}",
+            "missing_options": missing_required
+        }
+
+    def model_excluded_error(self, selection: int) -> Optional[Dict[str, Any]]:
+        """Error when options this model excludes are selected"""
+        if not selection & self.model_excluded_mask:
+            return None
+        conflicting_options = self.index.codes_in(selection, self.model_excluded)
+        return {
+            "type": "model_excluded_options",
+            "message": f"{self.model_name} cannot have: {', '.join(conflicting_options)}",
+            "conflicting_options": conflicting_options
+        }
+
+    def model_errors(self, selection: int) -> List[Dict[str, Any]]:
+        """Model-specific required/excluded option errors"""
+        errors = [self.model_required_error(selection), self.model_excluded_error(selection)]
+        return [error for error in errors if error]
+
+    def errors(self, configuration: Dict[str, Any], selection: Optional[int] = None) -> List[Dict[str, Any]]:
+        """All validation errors for a configuration, in the classic rule order"""
+        if selection is None:
+            selection = self.index.selection_mask(configuration)
+        errors = []
+        drivetrain_error = self.drivetrain_error(configuration.get("engine"), configuration.get("drivetrain"))
+        if drivetrain_error:
+            errors.append(drivetrain_error)
+        errors.extend(self.package_errors(selection, configuration))
+        errors.extend(self.incompatible_errors(selection))
+        errors.extend(self.required_errors(selection))
+        errors.extend(self.model_errors(selection))
+        return errors
+
+
+class SeasonalAvailability:
+    """Seasonal options compiled to one mask of unavailable options per calendar month
+
+    `available_months` restrict when an option can be ordered, `production_months`
+    when it can be built. Checking a configuration against a date is one AND of its
+    selection mask with the blocked mask of that month.
+    """
+
+    def __init__(self, seasonal: Dict[str, Any], index: OptionIndex):
+        self.index = index
+        self.codes: Tuple[str, ...] = tuple(seasonal)
+        self.order_months = {code: tuple(rule.get("available_months", MONTHS)) for code, rule in seasonal.items()}
+        self.production_months = {code: tuple(rule.get("production_months", MONTHS))
+                                  for code, rule in seasonal.items()}
+        self.order_blocked = tuple(
+            index.mask_of(code for code in self.codes if month not in self.order_months[code]) for month in MONTHS)
+        self.production_blocked = tuple(
+            index.mask_of(code for code in self.codes if month not in self.production_months[code])
+            for month in MONTHS)
+
+    def blocked_mask(self, order_date: Optional[date], production_date: Optional[date]) -> int:
+        """Options that cannot be had for these dates (a missing date restricts nothing)"""
+        mask = 0
+        if order_date is not None:
+            mask |= self.order_blocked[order_date.month - 1]
+        if production_date is not None:
+            mask |= self.production_blocked[production_date.month - 1]
+        return mask
+
+    def blocked_codes(self, order_date: Optional[date], production_date: Optional[date]) -> List[str]:
+        """Every seasonal option that cannot be had for these dates"""
+        return self.index.codes_in(self.blocked_mask(order_date, production_date), self.codes)
+
+    def unavailable(self, selection: int, blocked: int) -> List[str]:
+        """Selected options that are blocked, in catalog order"""
+        if not selection & blocked:
+            return []
+        return self.index.codes_in(selection & blocked, self.codes)
+
+    def errors(self, selection: int, order_date: Optional[date], production_date: Optional[date]) -> List[Dict[str, Any]]:
+        """One error per selected option that cannot be ordered or built on these dates"""
+        order_blocked = self.order_blocked[order_date.month - 1] if order_date is not None else 0
+        production_blocked = self.production_blocked[production_date.month - 1] if production_date is not None else 0
+        errors = []
+        for code in self.unavailable(selection, order_blocked | production_blocked):
+            bit = 1 << self.index.get(code)
+            if order_blocked & bit:
+                when = f"for orders in {calendar.month_name[order_date.month]}"
+                months = self.order_months[code]
+            else:
+                when = f"for production in {calendar.month_name[production_date.month]}"
+                months = self.production_months[code]
+            errors.append({
+                "type": "seasonal_unavailable",
+                "message": f"{code} is not available {when}",
+                "option": code,
+                "available_months": list(months)
+            })
+        return errors
+
+
+class ValidationState:
+    """Rule-relevant state of a configuration, carried between requests in a token"""
+
+    __slots__ = ("version", "model_name", "selection", "engine", "drivetrain", "errors")
+
+    def __init__(self, version: str, model_name: str, selection: int, engine: Optional[str],
+                 drivetrain: Optional[str], errors: Dict[str, Dict[str, Any]]):
+        self.version = version
+        self.model_name = model_name
+        self.selection = selection
+        self.engine = engine
+        self.drivetrain = drivetrain
+        self.errors = errors
+
+    def encode(self) -> str:
+        """Opaque URL-safe token (failing rule ids only; errors are rebuilt on demand)"""
+        payload = [self.version, self.model_name, format(self.selection, "x"),
+                   self.engine, self.drivetrain, sorted(self.errors)]
+        raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+    @classmethod
+    def decode(cls, token: str, compiled_for) -> "ValidationState":
+        """Parse a token; compiled_for(model_name, version) returns the matching CompiledConstraints"""
+        try:
+            padded = token + "=" * (-len(token) % 4)
+            version, model_name, selection_hex, engine, drivetrain, failing = json.loads(
+                base64.urlsafe_b64decode(padded.encode("ascii")))
+            selection = int(selection_hex, 16)
+        except (ValueError, TypeError, UnicodeError):
+            raise ValueError("Malformed validation state token")
+
+        compiled = compiled_for(model_name, version)
+        if selection < 0 or selection >> len(compiled.index):
+            raise ValueError("Validation state token does not match the catalog")
+        known = set(compiled.rule_ids)
+        if not isinstance(failing, list) or not known.issuperset(failing):
+            raise ValueError("Validation state token does not match the catalog")
+        for value in (engine, drivetrain):
+            if value is not None and not isinstance(value, str):
+                raise ValueError("Malformed validation state token")
+        errors = {rule_id: compiled.check_rule(rule_id, selection, engine, drivetrain) for rule_id in failing}
+        return cls(version, model_name, selection, engine, drivetrain,
+                   {rule_id: error for rule_id, error in errors.items() if error})
+
+
+def start_state(compiled: CompiledConstraints, version: str, model_name: str,
+                configuration: Dict[str, Any]) -> ValidationState:
+    """Full evaluation that seeds incremental validation"""
+    selection = compiled.index.selection_mask(configuration)
+    engine, drivetrain = configuration.get("engine"), configuration.get("drivetrain")
+    engine = engine if isinstance(engine, str) and engine else None
+    drivetrain = drivetrain if isinstance(drivetrain, str) and drivetrain else None
+    errors = {}
+    for rule_id in compiled.rule_ids:
+        error = compiled.check_rule(rule_id, selection, engine, drivetrain)
+        if error:
+            errors[rule_id] = error
+    return ValidationState(version, model_name, selection, engine, drivetrain, errors)
+
+
+def apply_change(compiled: CompiledConstraints, state: ValidationState, option: str,
+                 value: Any) -> Tuple[ValidationState, Dict[str, Dict[str, Any]], List[str]]:
+    """Apply one toggle and re-evaluate only the rules that mention it
+
+    Returns the new state, the errors that appeared or changed (by rule id)
+    and the ids of rules that no longer fail.
+    """
+    selection, engine, drivetrain = state.selection, state.engine, state.drivetrain
+    if option == "engine":
+        engine = value if isinstance(value, str) and value else None
+    elif option == "drivetrain":
+        drivetrain = value if isinstance(value, str) and value else None
+    else:
+        bit = compiled.index.get(option)
+        if bit is not None:
+            selection = selection | 1 << bit if value else selection & ~(1 << bit)
+
+    errors = dict(state.errors)
+    changed: Dict[str, Dict[str, Any]] = {}
+    resolved: List[str] = []
+    for rule_id in compiled.reverse_index.get(option, ()):
+        error = compiled.check_rule(rule_id, selection, engine, drivetrain)
+        previous = errors.get(rule_id)
+        if error and error != previous:
+            errors[rule_id] = changed[rule_id] = error
+        elif not error and previous:
+            del errors[rule_id]
+            resolved.append(rule_id)
+
+    return ValidationState(state.version, state.model_name, selection, engine, drivetrain, errors), changed, resolved
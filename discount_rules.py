@@ -0,0 +1,109 @@
+"""
+Package discount rules
+Compiles the catalog's declarative discount rules (pricing["package_discounts"])
+into (mask, amount) pairs over the shared OptionIndex, so a quote evaluates
+every rule with a few integer operations
+
+Rule fields:
+    id            unique rule id, reported when the rule applies
+    description   customer-facing label
+    amount        discount in dollars
+    all_of        options that must all be selected
+    any_of        options of which at least min_any (default 1) must be selected
+    min_packages  minimum number of selected "*_Package" keys
+"""
+
+from typing import Dict, List, Any, FrozenSet, Iterable, NamedTuple, Tuple
+
+from constraint_engine import OptionIndex
+
+
+class DiscountRule(NamedTuple):
+    rule_id: str
+    description: str
+    amount: float
+    all_mask: int
+    any_mask: int
+    min_any: int
+    min_packages: int
+
+
+def package_count(configuration: Dict[str, Any]) -> int:
+    """Selected keys calculate_total_price treats as packages"""
+    return sum(1 for key, value in configuration.items() if value and key.endswith("_Package"))
+
+
+class CompiledDiscounts:
+    """Discount rules of one catalog; each rule is only checked when it can apply"""
+
+    def __init__(self, rules: Iterable[Dict[str, Any]], index: OptionIndex):
+        self.index = index
+        self.rules: List[DiscountRule] = []
+        codes: Dict[str, None] = {}
+        for rule in rules:
+            rule_id = rule.get("id")
+            if not isinstance(rule_id, str) or any(known.rule_id == rule_id for known in self.rules):
+                raise ValueError(f"Discount rules need unique string ids (got {rule_id!r})")
+            amount = rule.get("amount")
+            if isinstance(amount, bool) or not isinstance(amount, (int, float)) or amount < 0:
+                raise ValueError(f"Discount rule {rule_id}: amount must be a non-negative number")
+            all_of, any_of = tuple(rule.get("all_of", ())), tuple(rule.get("any_of", ()))
+            codes.update(dict.fromkeys(all_of + any_of))
+            self.rules.append(DiscountRule(
+                rule_id=rule_id,
+                description=rule.get("description", rule_id),
+                amount=amount,
+                all_mask=index.mask_of(all_of),
+                any_mask=index.mask_of(any_of),
+                min_any=int(rule.get("min_any", 1 if any_of else 0)),
+                min_packages=int(rule.get("min_packages", 0))
+            ))
+        # Every option a rule looks at, in first-mention order
+        self.codes: Tuple[str, ...] = tuple(codes)
+        self._code_set = frozenset(codes)
+
+        # A rule that needs options is keyed by its lowest required bit and only checked
+        # when that option is selected; rules that need none are always checked
+        self._triggered: Dict[int, List[int]] = {}
+        self._always: List[int] = []
+        for position, rule in enumerate(self.rules):
+            if rule.all_mask:
+                trigger = (rule.all_mask & -rule.all_mask).bit_length() - 1
+                self._triggered.setdefault(trigger, []).append(position)
+            else:
+                self._always.append(position)
+        self._trigger_mask = sum(1 << bit for bit in self._triggered)
+
+    @staticmethod
+    def matches(rule: DiscountRule, selection: int, packages: int) -> bool:
+        return (selection & rule.all_mask == rule.all_mask
+                and bin(selection & rule.any_mask).count("1") >= rule.min_any
+                and packages >= rule.min_packages)
+
+    def applied(self, selection: int, packages: int) -> List[DiscountRule]:
+        """Rules that apply to a selection mask with `packages` selected packages, in rule order"""
+        positions = list(self._always)
+        triggers = selection & self._trigger_mask
+        while triggers:
+            lowest = triggers & -triggers
+            positions.extend(self._triggered[lowest.bit_length() - 1])
+            triggers ^= lowest
+        positions.sort()
+        return [self.rules[position] for position in positions
+                if self.matches(self.rules[position], selection, packages)]
+
+    def evaluate(self, configuration: Dict[str, Any]) -> Tuple[float, List[Dict[str, Any]]]:
+        """Total discount of a configuration and the rules that produced it"""
+        rules = self.applied(self.index.selection_mask(configuration), package_count(configuration))
+        return sum(rule.amount for rule in rules), [describe(rule) for rule in rules]
+
+    def state_key(self, configuration: Dict[str, Any]) -> FrozenSet[str]:
+        """Selected keys the discount depends on; equal keys always get equal discounts"""
+        codes = self._code_set
+        return frozenset(key for key, value in configuration.items()
+                         if value and (key.endswith("_Package") or key in codes))
+
+
+def describe(rule: DiscountRule) -> Dict[str, Any]:
+    """How an applied rule is reported in a price breakdown"""
+    return {"rule": rule.rule_id, "description": rule.description, "amount": rule.amount}
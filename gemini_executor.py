@@ -0,0 +1,173 @@
+"""
+Gemini Call Executor
+Runs Gemini calls on a small bounded thread pool instead of the request
+worker. Each request waits at most its deadline and stops waiting as soon as
+its client disconnects; when every slot is busy new calls are refused at once
+rather than queued, so a slow upstream cannot starve the catalog and pricing
+routes. Streaming calls are consumed on the pool too, and stop pulling chunks
+as soon as nobody reads them.
+"""
+
+import contextvars
+import queue
+import select
+import socket
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, Any, Callable, Iterable, Iterator, Optional
+
+
+class GeminiOverloaded(Exception):
+    """Every in-flight slot is taken"""
+
+
+class GeminiTimeout(Exception):
+    """The call did not finish before the request's deadline"""
+
+
+class ClientDisconnected(Exception):
+    """The client went away while its call was running"""
+
+
+def socket_closed(sock: Optional[socket.socket]) -> bool:
+    """Whether the peer closed a connection (readable with no data left); False when unknown
+
+    Only plain sockets can be peeked: a TLS socket rejects MSG_PEEK, and readable
+    TLS records say nothing about whether the client is still there.
+    """
+    if type(sock) is not socket.socket:
+        return False
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+        return bool(readable) and sock.recv(1, socket.MSG_PEEK) == b""
+    except ValueError:
+        return False
+    except OSError:
+        return True
+
+
+class GeminiExecutor:
+    """At most max_in_flight concurrent Gemini calls, each on its own pool thread"""
+
+    def __init__(self, max_in_flight: int = 8, poll_interval: float = 0.25):
+        self.max_in_flight = max_in_flight
+        self.poll_interval = poll_interval
+        # One thread per slot: an accepted call starts at once and never waits in a queue
+        self._pool = ThreadPoolExecutor(max_workers=max(max_in_flight, 1), thread_name_prefix="gemini")
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = self.rejected = self.timed_out = self.abandoned = 0
+
+    def submit(self, call: Callable[[], Any]) -> Future:
+        """Start call() on the pool (in the caller's context, so the pinned catalog follows it)
+
+        Raises GeminiOverloaded when max_in_flight calls are already running.
+        """
+        with self._lock:
+            if self.in_flight >= self.max_in_flight:
+                self.rejected += 1
+                raise GeminiOverloaded(f"{self.max_in_flight} Gemini calls already in flight")
+            self.in_flight += 1
+        try:
+            future = self._pool.submit(contextvars.copy_context().run, call)
+        except BaseException:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future: Optional[Future]) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += future is not None
+
+    def wait(self, future: Future, timeout: float, disconnected: Optional[Callable[[], bool]] = None) -> Any:
+        """Result of a submitted call, waiting at most timeout seconds
+
+        Raises GeminiTimeout at the deadline and ClientDisconnected once disconnected()
+        is true. The call itself keeps its slot until the upstream returns; other
+        requests sharing it can still use its result.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                with self._lock:
+                    self.timed_out += 1
+                raise GeminiTimeout(f"Gemini call exceeded {timeout:g}s")
+            try:
+                return future.result(timeout=min(remaining, self.poll_interval))
+            except FutureTimeoutError:
+                pass
+            if disconnected is not None and disconnected():
+                with self._lock:
+                    self.abandoned += 1
+                raise ClientDisconnected("Client disconnected while waiting for Gemini")
+
+    def run(self, call: Callable[[], Any], timeout: float, disconnected: Optional[Callable[[], bool]] = None) -> Any:
+        """submit() then wait()"""
+        return self.wait(self.submit(call), timeout, disconnected)
+
+    def stream(self, open_stream: Callable[[], Iterable[str]], timeout: float,
+               disconnected: Optional[Callable[[], bool]] = None) -> Iterator[str]:
+        """Chunks of a streaming call, read on the pool and handed over as they arrive
+
+        Takes a slot at once (raising GeminiOverloaded like submit()). The returned
+        iterator raises GeminiTimeout when the whole stream has not finished within
+        timeout seconds and ClientDisconnected once disconnected() is true; closing it
+        early makes the pool thread stop reading the upstream stream.
+        """
+        chunks: "queue.Queue" = queue.Queue()
+        cancelled = threading.Event()
+
+        def produce():
+            try:
+                for chunk in open_stream():
+                    if cancelled.is_set():
+                        return
+                    chunks.put((chunk, None))
+            except Exception as e:
+                chunks.put((None, e))
+                return
+            chunks.put((None, None))
+
+        self.submit(produce)
+        return self._drain(chunks, cancelled, timeout, disconnected)
+
+    def _drain(self, chunks: "queue.Queue", cancelled: threading.Event, timeout: float,
+               disconnected: Optional[Callable[[], bool]]) -> Iterator[str]:
+        deadline = time.monotonic() + timeout
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    with self._lock:
+                        self.timed_out += 1
+                    raise GeminiTimeout(f"Gemini stream exceeded {timeout:g}s")
+                try:
+                    chunk, error = chunks.get(timeout=min(remaining, self.poll_interval))
+                except queue.Empty:
+                    if disconnected is not None and disconnected():
+                        with self._lock:
+                            self.abandoned += 1
+                        raise ClientDisconnected("Client disconnected while Gemini was streaming")
+                    continue
+                if error is not None:
+                    raise error
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            cancelled.set()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "in_flight": self.in_flight,
+                "max_in_flight": self.max_in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+                "abandoned": self.abandoned
+            }
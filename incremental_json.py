@@ -0,0 +1,102 @@
+"""
+Incremental JSON Field Scanner
+Reads a JSON object as it streams in, chunk by chunk, and reports every member
+of selected nested objects ("recommended_config", "reasoning") as soon as its
+value is complete, long before the closing brace of the whole document arrives.
+Text before the first "{" (such as a markdown code fence) is skipped.
+"""
+
+import json
+from typing import Any, Iterable, List, Optional, Tuple
+
+_WHITESPACE = " \t\r\n"
+
+
+class _Frame:
+    """An open object or array, its current member key and where that member's value started"""
+    __slots__ = ("is_object", "key", "expecting_key", "value_start")
+
+    def __init__(self, is_object: bool):
+        self.is_object = is_object
+        self.key: Optional[str] = None
+        self.expecting_key = is_object
+        self.value_start: Optional[int] = None
+
+
+class JsonFieldStream:
+    """Scanner reporting (section, field, value) for members of the watched top-level objects"""
+
+    def __init__(self, sections: Iterable[str]):
+        self.sections = frozenset(sections)
+        self.text = ""
+        self._position = 0
+        self._stack: List[_Frame] = []
+        self._started = False
+        self.finished = False
+        self._string_start: Optional[int] = None
+        self._escaped = False
+        self._scalar_start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Tuple[str, str, Any]]:
+        """Scan one more chunk; returns the members completed by it, in document order"""
+        completed: List[Tuple[str, str, Any]] = []
+        if self.finished or not chunk:
+            return completed
+        self.text += chunk
+        text = self.text
+        position = self._position
+        while position < len(text) and not self.finished:
+            char = text[position]
+            if not self._started:
+                if char == "{":
+                    self._started = True
+                    self._stack.append(_Frame(True))
+            elif self._string_start is not None:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    start, self._string_start = self._string_start, None
+                    frame = self._stack[-1]
+                    if frame.is_object and frame.expecting_key:
+                        frame.key = json.loads(text[start:position + 1])
+                        frame.expecting_key = False
+                    else:
+                        self._complete(start, position + 1, completed)
+            elif self._scalar_start is not None and (char in _WHITESPACE or char in ",}]"):
+                start, self._scalar_start = self._scalar_start, None
+                self._complete(start, position, completed)
+                continue  # the delimiter itself is handled on the next pass
+            elif char in _WHITESPACE or char == ":":
+                pass
+            elif char == '"':
+                self._string_start = position
+            elif char in "{[":
+                self._stack[-1].value_start = position
+                self._stack.append(_Frame(char == "{"))
+            elif char in "}]":
+                self._stack.pop()
+                if not self._stack:
+                    self.finished = True
+                else:
+                    self._complete(self._stack[-1].value_start, position + 1, completed)
+            elif char == ",":
+                frame = self._stack[-1]
+                frame.expecting_key = frame.is_object
+            elif self._scalar_start is None:
+                self._scalar_start = position
+            position += 1
+        self._position = position
+        return completed
+
+    def _complete(self, start: int, end: int, completed: List[Tuple[str, str, Any]]) -> None:
+        """A value just ended; report it when it is a member of a watched section"""
+        stack = self._stack
+        if len(stack) != 2 or not stack[1].is_object or stack[0].key not in self.sections:
+            return
+        try:
+            value = json.loads(self.text[start:end])
+        except ValueError:
+            return
+        completed.append((stack[0].key, stack[1].key, value))
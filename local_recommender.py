@@ -0,0 +1,238 @@
+"""
+BMW Local Recommender
+Deterministic configuration recommendation without Gemini: every option is
+scored on the preference themes of analyze_user_preferences plus the category,
+price and model heuristics behind the AI prompt's model notes, and the best
+choice of each independent decision is taken, so the result is always a valid,
+catalog-priced configuration
+"""
+
+import weakref
+from typing import Dict, List, Any, NamedTuple, Optional
+
+from configuration_optimizer import OPTION_THEMES, get_optimizer, normalize_weights
+
+# Score lost per $1,000 even without a budget focus, so every option has to earn its price
+BASE_PRICE_SENSITIVITY = 0.25
+
+# Entry-level models stay lean ("avoid over-optioning"); expensive ones get the flagship extras
+ENTRY_LEVEL_PRICE = 40000
+ENTRY_LEVEL_PRICE_SENSITIVITY = 1.0
+LUXURY_LEVEL_PRICE = 80000
+
+# How each theme is named in the reasoning
+THEME_LABELS = {
+    "budget_conscious": "budget",
+    "performance_oriented": "performance",
+    "luxury_oriented": "luxury",
+    "tech_savvy": "technology",
+    "family_oriented": "family",
+    "eco_conscious": "eco",
+}
+
+# (configuration key, pricing table, reasoning key) of the single-value decisions
+SINGLE_CHOICES = (
+    ("engine", "engines", "engine"),
+    ("drivetrain", "drivetrains", "drivetrain"),
+    ("exterior_color", "exterior_colors", "color"),
+    ("wheels", "wheel_options", "wheels"),
+    ("interior", "interior_options", "interior"),
+)
+
+
+class Heuristic(NamedTuple):
+    """Flat score bonuses for some option codes, and why they apply"""
+    reason: str
+    bonuses: Dict[str, float]
+
+
+# The option side of get_model_specific_recommendations in app.py
+CATEGORY_HEURISTICS = {
+    "suv": Heuristic("suits an SUV", {
+        "xDrive": 1.5, "AWD": 1.5, "Convenience_Package": 1.0,
+        "19_Inch_Style_849M": 0.5, "20_Inch_Style_850M": 0.5,
+    }),
+    "sedan": Heuristic("suits the sedan's character", {
+        "M_Sport_Package": 1.0, "Premium_Package": 1.0, "Technology_Package": 1.0,
+    }),
+    "m": Heuristic("recommended for M models", {
+        "Carbon_Fiber_Trim": 1.0, "Sport_Exhaust": 1.0, "M_Performance_Exhaust": 1.0,
+    }),
+}
+LUXURY_LEVEL_HEURISTIC = Heuristic("expected at this price point", {
+    "Executive_Package": 1.0, "Bowers_Wilkins_Audio": 1.0, "Individual_Paint": 0.5, "Merino_Individual": 0.5,
+})
+ENTRY_LEVEL_HEURISTIC = Heuristic("best value at this price point", {"Technology_Package": 1.0})
+MODEL_BONUSES: Dict[str, Dict[str, float]] = {
+    "X1": {"Premium_Package": 1.5},
+    "X3": {"M_Sport_Package": 1.5},
+    "X5": {"Executive_Package": 1.5},
+    "3 Series": {"M_Sport_Package": 2.0},
+    "5 Series": {"Executive_Package": 1.5},
+    "7 Series": {"Individual_Paint": 1.0, "Merino_Individual": 1.0, "21_Inch_Individual": 1.0},
+    "M3": {"M_Performance_Exhaust": 1.0, "Carbon_Fiber_Trim": 1.0},
+    "M5": {"M_Sport_Package": 1.0, "M_Performance_Exhaust": 1.0},
+    "i4": {"Technology_Package": 1.5},
+    "iX": {"Premium_Package": 1.5},
+}
+
+
+def and_join(words: List[str]) -> str:
+    """'a', 'a and b', 'a, b and c'"""
+    return " and ".join([", ".join(words[:-1]), words[-1]]) if len(words) > 1 else "".join(words)
+
+
+def model_heuristics(model_name: str, model_data: Dict[str, Any]) -> List[Heuristic]:
+    """Heuristics that apply to a model, by category, base price and name"""
+    category = model_data.get("category", "").lower()
+    base_price = model_data.get("base_price", 0)
+    heuristics = []
+    if "suv" in category:
+        heuristics.append(CATEGORY_HEURISTICS["suv"])
+    elif "sedan" in category:
+        heuristics.append(CATEGORY_HEURISTICS["sedan"])
+    elif "electric" not in category and ("m performance" in category or model_name.startswith("M")):
+        heuristics.append(CATEGORY_HEURISTICS["m"])
+    if base_price > LUXURY_LEVEL_PRICE:
+        heuristics.append(LUXURY_LEVEL_HEURISTIC)
+    elif base_price < ENTRY_LEVEL_PRICE:
+        heuristics.append(ENTRY_LEVEL_HEURISTIC)
+    if model_name in MODEL_BONUSES:
+        heuristics.append(Heuristic(f"recommended for the {model_name}", MODEL_BONUSES[model_name]))
+    return heuristics
+
+
+class LocalRecommender:
+    """Best configuration for a set of preference themes, without a budget and without search"""
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.optimizer = get_optimizer(catalog)
+
+    def recommend(self, model_name: str, preferences: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Recommended configuration with its price, validation and per-option reasons
+
+        None when the model is not in the catalog or has no valid configuration.
+        """
+        model_data = self.catalog.get_model_data(model_name)
+        if not model_data:
+            return None
+        themes = normalize_weights(preferences)
+        heuristics = model_heuristics(model_name, model_data)
+
+        bonuses: Dict[str, float] = {}
+        for heuristic in heuristics:
+            for code, bonus in heuristic.bonuses.items():
+                bonuses[code] = bonuses.get(code, 0.0) + bonus
+        weights = dict(themes)
+        weights["budget_conscious"] += BASE_PRICE_SENSITIVITY
+        if model_data.get("base_price", 0) < ENTRY_LEVEL_PRICE:
+            weights["budget_conscious"] += ENTRY_LEVEL_PRICE_SENSITIVITY
+
+        # Decision groups are independent (constraints live inside them) and the price penalty is
+        # linear, so the best configuration is simply the best choice of every group
+        groups = self.optimizer.decision_groups(self.optimizer.get_space(model_name), weights, bonuses)
+        if any(not choices for choices in groups):
+            return None
+        configuration: Dict[str, Any] = {}
+        score = 0.0
+        for choices in groups:
+            choice_score, _, assignment = choices[0]
+            configuration.update(assignment)
+            score += choice_score
+
+        return {
+            "model": model_name,
+            "configuration": configuration,
+            "score": round(score, 4),
+            "weights": weights,
+            "reasons": {code: self.reason(code, themes, heuristics) for code in self.selected_codes(configuration)},
+            "price_breakdown": self.catalog.calculate_total_price(model_name, configuration),
+            "validation": self.catalog.validate_configuration(model_name, configuration)
+        }
+
+    @staticmethod
+    def selected_codes(configuration: Dict[str, Any]) -> List[str]:
+        return [value if isinstance(value, str) else key for key, value in configuration.items() if value]
+
+    @staticmethod
+    def reason(code: str, themes: Dict[str, float], heuristics: List[Heuristic]) -> str:
+        """Why an option was chosen, from the themes it serves and the heuristics that favour it"""
+        matched = [THEME_LABELS[theme] for theme in OPTION_THEMES.get(code, {}) if themes[theme] > 0]
+        reasons = [f"matches your {and_join(matched)} focus"] if matched else []
+        reasons.extend(heuristic.reason for heuristic in heuristics if code in heuristic.bonuses)
+        return "; ".join(reasons) if reasons else "best value choice"
+
+    def option_name(self, table: str, code: str) -> str:
+        details = self.catalog.pricing[table].get(code, {})
+        return details.get("name") or code.replace("_", " ")
+
+    def suggestion(self, model_name: str, preferences: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """recommend() in the shape of a Gemini suggestion (recommended_config, reasoning, price_estimate)"""
+        result = self.recommend(model_name, preferences)
+        if result is None:
+            return None
+        configuration = result["configuration"]
+        breakdown = result["price_breakdown"]
+        packages_table = self.catalog.pricing["packages"]
+        flags = [key for key, value in configuration.items() if value is True]
+        packages = [code for code in flags if code in packages_table]
+        options = [code for code in flags if code not in packages_table]
+
+        reasoning = {}
+        for key, table, reasoning_key in SINGLE_CHOICES:
+            code = configuration.get(key)
+            if code:
+                reasoning[reasoning_key] = f"{self.option_name(table, code)}: {result['reasons'][code]}"
+        if packages:
+            reasoning["packages"] = "; ".join(
+                f"{code.replace('_', ' ')}: {result['reasons'][code]}" for code in packages)
+        else:
+            reasoning["packages"] = "No package adds enough for these preferences to justify its price"
+        focus = [THEME_LABELS[theme] for theme, weight in normalize_weights(preferences).items() if weight > 0]
+        reasoning["overall"] = (
+            f"Local recommendation for the {model_name}, scored on "
+            f"{'your ' + and_join(focus) + ' focus' if focus else 'value'} and {model_name} heuristics: "
+            f"${breakdown['total_msrp']:,.0f} MSRP"
+            + (f" after ${breakdown['package_discount']:,.0f} in package discounts" if breakdown["package_discount"] else "")
+        )
+
+        return {
+            "recommended_config": {
+                "engine": configuration.get("engine"),
+                "drivetrain": configuration.get("drivetrain"),
+                "exterior_color": configuration.get("exterior_color"),
+                "wheels": configuration.get("wheels"),
+                "interior": configuration.get("interior"),
+                "packages": packages,
+                "individual_options": options
+            },
+            "reasoning": reasoning,
+            "price_estimate": {
+                "base_price": breakdown["base_price"],
+                "engine_cost": breakdown["engine_upgrade"],
+                "drivetrain_cost": breakdown["drivetrain_upgrade"],
+                "color_cost": breakdown["exterior_options"],
+                "interior_cost": breakdown["interior_options"],
+                "packages_cost": breakdown["packages"],
+                "options_cost": breakdown["individual_options"],
+                "estimated_options": breakdown["subtotal"] - breakdown["base_price"],
+                "estimated_total": breakdown["total_msrp"]
+            },
+            "warnings": [warning["message"] if isinstance(warning, dict) else warning
+                         for warning in result["validation"].get("warnings", [])],
+            "price_breakdown": breakdown,
+            "validation": result["validation"],
+            "type": "local_recommendation"
+        }
+
+
+_recommenders: "weakref.WeakKeyDictionary[Any, LocalRecommender]" = weakref.WeakKeyDictionary()
+
+
+def get_local_recommender(catalog) -> LocalRecommender:
+    """Local recommender for a catalog, built once per catalog instance"""
+    recommender = _recommenders.get(catalog)
+    if recommender is None:
+        recommender = _recommenders[catalog] = LocalRecommender(catalog)
+    return recommender
@@ -0,0 +1,179 @@
+"""
+BMW Option Symbols
+One symbol table per catalog resolving option codes, display names and loose
+spellings ("alpine white", "M Sport", "Harman Kardon sound") to canonical
+option codes, so AI output can be turned into configuration keys server-side
+"""
+
+import difflib
+import re
+import sys
+import weakref
+from typing import Dict, List, Any, Iterable, NamedTuple, Optional, Set, Tuple
+
+# Recommendation fields -> option kind they name
+RECOMMENDATION_FIELDS: Dict[str, str] = {
+    "engine": "engines",
+    "drivetrain": "drivetrains",
+    "exterior_color": "exterior_colors",
+    "wheels": "wheel_options",
+    "interior": "interior_options",
+    "packages": "packages",
+    "individual_options": "individual_options",
+}
+
+# Pricing tables of single-value selections, each its own option kind
+OPTION_TABLES = ("drivetrains", "exterior_colors", "wheel_options", "interior_options", "individual_options")
+
+# Fields that hold a list of options rather than a single choice
+MULTI_VALUE_FIELDS = ("packages", "individual_options")
+
+FUZZY_CUTOFF = 0.6
+
+_SEPARATORS = re.compile(r"[^a-z0-9]+")
+_FILLER_WORDS = ("bmw", "package", "option", "color", "paint", "interior", "wheels")
+
+
+def normalize(text: str) -> str:
+    """Lowercase words only: 'Alpine_White', 'alpine-white ' and 'Alpine White' all match"""
+    return " ".join(_SEPARATORS.split(text.lower())).strip()
+
+
+def short_form(alias: str) -> str:
+    """A normalized alias without filler words ('premium package' -> 'premium')"""
+    words = [word for word in alias.split() if word not in _FILLER_WORDS]
+    return " ".join(words)
+
+
+def display_name(code: str, details: Dict[str, Any]) -> str:
+    """Name shown to customers; tables without a name field use the code ('Alpine_White' -> 'Alpine White')"""
+    return details.get("name") or code.replace("_", " ")
+
+
+class Resolution(NamedTuple):
+    code: Optional[str]
+    match: str  # "exact", "alias", "partial", "fuzzy" or "unresolved"
+
+
+class OptionSymbolTable:
+    """Per-kind alias -> code maps over one catalog; lookups are a dict probe, fuzzy search is the fallback"""
+
+    def __init__(self, catalog):
+        sources: Dict[str, Dict[str, Any]] = {"engines": catalog.pricing["engines"], "packages": catalog.packages}
+        sources.update((table, catalog.pricing.get(table, {})) for table in OPTION_TABLES)
+
+        self.names: Dict[str, Dict[str, str]] = {}
+        self._exact: Dict[str, Dict[str, str]] = {}
+        self._aliases: Dict[str, Dict[str, str]] = {}
+        for kind, table in sources.items():
+            names = self.names[kind] = {}
+            exact = self._exact[kind] = {}
+            aliases = self._aliases[kind] = {}
+            for code, details in table.items():
+                names[code] = sys.intern(display_name(code, details))
+                exact[code] = code
+                exact.setdefault(names[code], code)
+            # Canonical spellings win over derived ones when two options share an alias
+            for code, name in names.items():
+                for alias in (normalize(code), normalize(name)):
+                    aliases.setdefault(sys.intern(alias), code)
+            for code, name in names.items():
+                for alias in (short_form(normalize(code)), short_form(normalize(name))):
+                    if alias:
+                        aliases.setdefault(sys.intern(alias), code)
+
+    def name_of(self, kind: str, code: str) -> str:
+        return self.names.get(kind, {}).get(code, code.replace("_", " "))
+
+    def resolve(self, kind: str, value: Any, allowed: Optional[Set[str]] = None) -> Resolution:
+        """Canonical code of an option of `kind` named by `value`, limited to `allowed` codes if given
+
+        Tries, in order: the code or display name as written, a normalized alias, a
+        unique option whose alias contains every word of the value, and the closest
+        alias by similarity.
+        """
+        if not isinstance(value, str) or not value.strip() or kind not in self._exact:
+            return Resolution(None, "unresolved")
+
+        def usable(code):
+            return code is not None and (allowed is None or code in allowed)
+
+        code = self._exact[kind].get(value.strip())
+        if usable(code):
+            return Resolution(code, "exact")
+
+        aliases = self._aliases[kind]
+        wanted = normalize(value)
+        for alias in (wanted, short_form(wanted)):
+            code = aliases.get(alias)
+            if usable(code):
+                return Resolution(code, "alias")
+
+        candidates = [(alias, code) for alias, code in aliases.items() if usable(code)]
+        words = set(wanted.split())
+        partial = {code for alias, code in candidates if words and words <= set(alias.split())}
+        if len(partial) == 1:
+            return Resolution(partial.pop(), "partial")
+        if partial:
+            # Several options contain every word: pick the closest of those, not of everything
+            candidates = [(alias, code) for alias, code in candidates if code in partial]
+
+        closest = difflib.get_close_matches(wanted, [alias for alias, _ in candidates], n=1, cutoff=FUZZY_CUTOFF)
+        if closest:
+            return Resolution(aliases[closest[0]], "fuzzy")
+        return Resolution(None, "unresolved")
+
+    def resolve_recommendation(self, recommended: Dict[str, Any],
+                               allowed: Optional[Dict[str, Iterable[str]]] = None
+                               ) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """Turn an AI recommended_config into canonical codes
+
+        allowed: kind -> codes the model offers. Returns the resolved config (single
+        fields None when unresolved, list fields keep what resolved, without
+        duplicates) and the values that could not be resolved.
+        """
+        allowed_sets = {kind: set(codes) for kind, codes in (allowed or {}).items()}
+        resolved: Dict[str, Any] = {}
+        unresolved: List[Dict[str, Any]] = []
+        for field, kind in RECOMMENDATION_FIELDS.items():
+            if field not in recommended:
+                continue
+            value = recommended[field]
+            if field in MULTI_VALUE_FIELDS:
+                values = value if isinstance(value, (list, tuple)) else [value] if value else []
+                codes = []
+                for item in values:
+                    code = self.resolve(kind, item, allowed_sets.get(kind)).code
+                    if code is None:
+                        unresolved.append({"field": field, "value": item})
+                    elif code not in codes:
+                        codes.append(code)
+                resolved[field] = codes
+            elif value is None:
+                resolved[field] = None
+            else:
+                code = self.resolve(kind, value, allowed_sets.get(kind)).code
+                if code is None:
+                    unresolved.append({"field": field, "value": value})
+                resolved[field] = code
+        return resolved, unresolved
+
+    def names_for(self, resolved: Dict[str, Any]) -> Dict[str, str]:
+        """Display name of every code in a resolved recommendation"""
+        names = {}
+        for field, kind in RECOMMENDATION_FIELDS.items():
+            value = resolved.get(field)
+            for code in (value if isinstance(value, list) else [value] if value else []):
+                names[code] = self.name_of(kind, code)
+        return names
+
+
+_symbol_tables: "weakref.WeakKeyDictionary[Any, OptionSymbolTable]" = weakref.WeakKeyDictionary()
+
+
+def get_symbol_table(catalog) -> OptionSymbolTable:
+    """Symbol table for a catalog, built once per catalog instance"""
+    table = _symbol_tables.get(catalog)
+    if table is None:
+        table = _symbol_tables[catalog] = OptionSymbolTable(catalog)
+    return table
@@ -0,0 +1,137 @@
+"""
+BMW Price Index
+Cheapest and most expensive valid configuration of every model, found exactly
+over the factored configuration space and priced with calculate_total_price
+"""
+
+import weakref
+from typing import Callable, Dict, List, Any, FrozenSet, NamedTuple, Optional, Tuple
+
+from configuration_optimizer import get_optimizer, normalize_weights
+
+
+class PriceRange(NamedTuple):
+    """Achievable total MSRP of a model, with the configurations at both ends"""
+    min_price: float
+    max_price: float
+    cheapest: Dict[str, Any]
+    most_expensive: Dict[str, Any]
+
+
+def extreme_configurations(groups: List[List[Tuple[float, int, Dict[str, Any]]]],
+                           state_key: Callable[[Dict[str, Any]], FrozenSet[str]]) -> Dict[FrozenSet[str], Tuple]:
+    """Cheapest and dearest choice per reachable discount state, one choice from every group
+
+    Discounts only depend on the selected keys state_key returns (packages and the
+    options discount rules mention), so keeping the best option sums for each state
+    makes the final discounted totals exact.
+    """
+    # discount state -> (min sum, min choices, max sum, max choices); choices are a linked list
+    states: Dict[FrozenSet[str], Tuple] = {frozenset(): (0, None, 0, None)}
+    for choices in groups:
+        next_states: Dict[FrozenSet[str], Tuple] = {}
+        for selected, (low, low_path, high, high_path) in states.items():
+            for _, price, assignment in choices:
+                key = selected | state_key(assignment)
+                current = next_states.get(key)
+                candidate_low, candidate_high = low + price, high + price
+                if current is None:
+                    next_states[key] = (candidate_low, (assignment, low_path), candidate_high, (assignment, high_path))
+                    continue
+                best_low, best_low_path, best_high, best_high_path = current
+                if candidate_low < best_low:
+                    best_low, best_low_path = candidate_low, (assignment, low_path)
+                if candidate_high > best_high:
+                    best_high, best_high_path = candidate_high, (assignment, high_path)
+                next_states[key] = (best_low, best_low_path, best_high, best_high_path)
+        states = next_states
+    return states
+
+
+def configuration_from(path) -> Dict[str, Any]:
+    configuration: Dict[str, Any] = {}
+    while path is not None:
+        assignment, path = path
+        configuration.update(assignment)
+    return configuration
+
+
+def compute_price_range(catalog, model_name: str) -> Optional[PriceRange]:
+    """Exact achievable MSRP range of a model; None when it has no valid configuration"""
+    optimizer = get_optimizer(catalog)
+    groups = optimizer.decision_groups(optimizer.get_space(model_name), normalize_weights({}))
+    if any(not choices for choices in groups):
+        return None
+
+    cheapest = most_expensive = None
+    for low, low_path, high, high_path in extreme_configurations(groups, catalog.discounts.state_key).values():
+        for path in (low_path, high_path):
+            configuration = configuration_from(path)
+            total = catalog.calculate_total_price(model_name, configuration)["total_msrp"]
+            if cheapest is None or total < cheapest[0]:
+                cheapest = (total, configuration)
+            if most_expensive is None or total > most_expensive[0]:
+                most_expensive = (total, configuration)
+    return PriceRange(cheapest[0], most_expensive[0], cheapest[1], most_expensive[1])
+
+
+class PriceIndex:
+    """Achievable price range of every catalog model, computed once per catalog"""
+
+    def __init__(self, catalog):
+        self.ranges: Dict[str, Optional[PriceRange]] = {
+            model_name: compute_price_range(catalog, model_name) for model_name in catalog.models_data
+        }
+
+    def get(self, model_name: str) -> Optional[PriceRange]:
+        return self.ranges.get(model_name)
+
+    def fits(self, model_name: str, min_price: Optional[float], max_price: Optional[float]) -> bool:
+        """Whether the model's achievable price range overlaps [min_price, max_price]
+
+        Without bounds every model fits; with one, models without a known range (not in
+        the catalog, or no valid configuration) never do.
+        """
+        if min_price is None and max_price is None:
+            return True
+        price_range = self.ranges.get(model_name)
+        if price_range is None:
+            return False
+        if min_price is not None and price_range.max_price < min_price:
+            return False
+        if max_price is not None and price_range.min_price > max_price:
+            return False
+        return True
+
+    def summary(self, model_name: str) -> Optional[Dict[str, float]]:
+        price_range = self.ranges.get(model_name)
+        if price_range is None:
+            return None
+        return {"min_price": price_range.min_price, "max_price": price_range.max_price}
+
+    def filter_series(self, series_info: Dict[str, Any], min_price: Optional[float],
+                      max_price: Optional[float]) -> Dict[str, Any]:
+        """A series entry narrowed to the models that fit the price filters, with their ranges
+
+        Models whose price range is unknown cannot be matched against the filters; they are
+        listed under unpriced_models instead.
+        """
+        listed = series_info.get("models", [])
+        models = [model for model in listed if self.fits(model, min_price, max_price)]
+        return {
+            **series_info,
+            "models": models,
+            "price_ranges": {model: self.summary(model) for model in models},
+            "unpriced_models": [model for model in listed if self.ranges.get(model) is None]
+        }
+
+
+_price_indexes: "weakref.WeakKeyDictionary[Any, PriceIndex]" = weakref.WeakKeyDictionary()
+
+
+def get_price_index(catalog) -> PriceIndex:
+    """Price index for a catalog, built once per catalog instance"""
+    index = _price_indexes.get(catalog)
+    if index is None:
+        index = _price_indexes[catalog] = PriceIndex(catalog)
+    return index
@@ -0,0 +1,110 @@
+"""
+BMW Configuration Result Cache
+Configuration fingerprints and an LRU of validation and pricing results keyed
+on them, so configurations that come back again and again (AI
+suggestions, presets, users toggling an option off and on) are answered
+without re-running the catalog
+"""
+
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, Any, Callable, NamedTuple, Optional, Tuple
+
+from catalog_model import freeze
+
+class Fingerprint(NamedTuple):
+    """Everything a validation or pricing result depends on"""
+    version: str
+    model: str
+    months: Tuple[Optional[int], Optional[int]]
+    selection: Tuple[Tuple[str, Any], ...]
+
+
+def selection_key(configuration: Dict[str, Any]) -> Optional[Tuple[Tuple[str, Any], ...]]:
+    """Selected (key, value) pairs in configuration order; None when the configuration cannot be fingerprinted
+
+    Validation and pricing skip unselected keys, so those are dropped. Order and
+    values are kept because results follow them (itemized_breakdown and package
+    errors come out in configuration order); unhashable values make the
+    configuration uncacheable.
+    """
+    selection = []
+    for key, value in configuration.items():
+        if not value:
+            continue
+        if not isinstance(key, str):
+            return None
+        try:
+            hash(value)
+        except TypeError:
+            return None
+        selection.append((key, value))
+    return tuple(selection)
+
+
+def fingerprint(version: str, model: str, configuration: Any, order_date: Optional[date] = None,
+                production_date: Optional[date] = None) -> Optional[Fingerprint]:
+    """Stable cache key of one request; seasonal checks only depend on the months of the dates"""
+    if not isinstance(model, str) or not isinstance(configuration, dict):
+        return None
+    selection = selection_key(configuration)
+    if selection is None:
+        return None
+    months = (order_date.month if order_date else None, production_date.month if production_date else None)
+    return Fingerprint(version, model, months, selection)
+
+
+class ResultCache:
+    """Thread-safe LRU of read-only results keyed by Fingerprint, with hit/miss/eviction counters"""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Fingerprint, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.bypassed = 0
+
+    def get_or_compute(self, key: Optional[Fingerprint], compute: Callable[[], Any]) -> Any:
+        """Cached result for key, computing (outside the lock) and storing it on a miss
+
+        Results are frozen, so callers can share them safely. A None key is computed
+        every time.
+        """
+        if key is None or self.max_entries <= 0:
+            with self._lock:
+                self.bypassed += 1
+            return compute()
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+            self.misses += 1
+        result = freeze(compute())
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return result
+
+    def retain_version(self, version: str) -> int:
+        """Drop every entry computed against another catalog version; returns how many were dropped"""
+        with self._lock:
+            stale = [key for key in self._entries if key.version != version]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "bypassed": self.bypassed
+            }
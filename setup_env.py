@@ -80,8 +80,6 @@ def check_dependencies():
     
     required_packages = [
         'flask',
-        'requests', 
-        'beautifulsoup4',
         'google-generativeai',
         'flask-cors',
         'python-dotenv'
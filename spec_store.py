@@ -0,0 +1,197 @@
+"""
+BMW Spec Store
+Parses model specifications ("228 hp", "6.6 seconds (0-60 mph)", fuel economy,
+dimensions, battery range) once into a columnar NumPy matrix, then filters,
+sorts, ranks and compares models in vectorized passes
+"""
+
+import re
+import weakref
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+import numpy as np
+
+# Searchable spec columns: name -> (unit, higher_is_better)
+SPEC_FIELDS: Dict[str, Tuple[str, bool]] = {
+    "horsepower": ("hp", True),
+    "torque": ("lb-ft", True),
+    "acceleration": ("seconds 0-60 mph", False),
+    "top_speed": ("mph", True),
+    "mpg_city": ("mpg (MPGe for electric)", True),
+    "mpg_highway": ("mpg (MPGe for electric)", True),
+    "mpg": ("combined mpg (MPGe for electric)", True),
+    "range": ("miles (best trim)", True),
+    "cargo": ("cu ft", True),
+    "length": ("in", False),
+    "width": ("in", False),
+    "height": ("in", False),
+    "wheelbase": ("in", True),
+    "base_price": ("USD", False),
+}
+
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+def parse_number(value: Any) -> float:
+    """First number in a spec value ("6.6 seconds (0-60 mph)" -> 6.6); NaN when there is none"""
+    if isinstance(value, bool) or value is None:
+        return np.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _NUMBER.search(str(value))
+    return float(match.group()) if match else np.nan
+
+
+def model_specs(model_data: Dict[str, Any]) -> Dict[str, float]:
+    """Every SPEC_FIELDS value of one model as a float (NaN when unknown)"""
+    performance = model_data.get("performance", {})
+    fuel_economy = model_data.get("fuel_economy", {})
+    dimensions = model_data.get("dimensions", {})
+    battery_range = model_data.get("battery_range") or {}
+    ranges = [parse_number(value) for value in battery_range.values()]
+    return {
+        "horsepower": parse_number(performance.get("power")),
+        "torque": parse_number(performance.get("torque")),
+        "acceleration": parse_number(performance.get("acceleration")),
+        "top_speed": parse_number(performance.get("top_speed")),
+        "mpg_city": parse_number(fuel_economy.get("city")),
+        "mpg_highway": parse_number(fuel_economy.get("highway")),
+        "mpg": parse_number(fuel_economy.get("combined")),
+        "range": max(ranges) if ranges else np.nan,
+        "cargo": parse_number(dimensions.get("cargo")),
+        "length": parse_number(dimensions.get("length")),
+        "width": parse_number(dimensions.get("width")),
+        "height": parse_number(dimensions.get("height")),
+        "wheelbase": parse_number(dimensions.get("wheelbase")),
+        "base_price": parse_number(model_data.get("base_price")),
+    }
+
+
+class SpecStore:
+    """(models x specs) float matrix of one catalog; NaN marks a spec a model does not have"""
+
+    def __init__(self, catalog):
+        self.models: List[str] = list(catalog.models_data)
+        self.fields: List[str] = list(SPEC_FIELDS)
+        self.columns = {field: column for column, field in enumerate(self.fields)}
+        self.rows = {model: row for row, model in enumerate(self.models)}
+        specs = [model_specs(catalog.get_model_data(model)) for model in self.models]
+        self.matrix = np.array([[spec[field] for field in self.fields] for spec in specs],
+                               dtype=np.float64).reshape(len(self.models), len(self.fields))
+        self.matrix.setflags(write=False)
+
+    def check_fields(self, fields: Iterable[str]) -> List[str]:
+        fields = list(fields)
+        unknown = [field for field in fields if field not in self.columns]
+        if unknown:
+            raise ValueError(f"Unknown spec fields: {', '.join(unknown)} (known: {', '.join(self.fields)})")
+        return fields
+
+    def row_mask(self, models: Optional[Iterable[str]]) -> np.ndarray:
+        """Rows of the requested models (all models when None)"""
+        if models is None:
+            return np.ones(len(self.models), dtype=bool)
+        models = list(models)
+        unknown = [model for model in models if model not in self.rows]
+        if unknown:
+            raise ValueError(f"Unknown models: {', '.join(unknown)}")
+        mask = np.zeros(len(self.models), dtype=bool)
+        mask[[self.rows[model] for model in models]] = True
+        return mask
+
+    def rank_scores(self, weights: Dict[str, float], rows: np.ndarray) -> np.ndarray:
+        """Weighted sum of min-max normalized specs over `rows`, oriented so higher is better
+
+        A spec a model lacks scores 0 for that spec.
+        """
+        fields = self.check_fields(weights)
+        values = self.matrix[np.ix_(rows, [self.columns[field] for field in fields])]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            low = np.nanmin(values, axis=0) if len(values) else np.zeros(len(fields))
+            high = np.nanmax(values, axis=0) if len(values) else np.zeros(len(fields))
+            spread = np.where(high > low, high - low, 1.0)
+            normalized = (values - low) / spread
+        better_high = np.array([SPEC_FIELDS[field][1] for field in fields])
+        normalized = np.where(better_high, normalized, 1.0 - normalized)
+        normalized = np.nan_to_num(normalized, nan=0.0)
+        return normalized @ np.array([float(weights[field]) for field in fields])
+
+    def search(self, filters: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+               sort: Optional[List[Tuple[str, bool]]] = None, rank: Optional[Dict[str, float]] = None,
+               models: Optional[Iterable[str]] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Filter, then order by rank score or sort keys, in one pass over the spec matrix
+
+        filters: field -> (min, max), inclusive, either side optional; a model missing the
+                 spec never passes a filter on it
+        sort:    [(field, descending)], applied in priority order; missing specs sort last
+        rank:    field -> weight; rows are ordered by weighted score (ties broken by sort)
+        """
+        rows = self.row_mask(models)
+        for field, (low, high) in (filters or {}).items():
+            column = self.matrix[:, self.columns[self.check_fields([field])[0]]]
+            with np.errstate(invalid="ignore"):
+                if low is not None:
+                    rows &= column >= low
+                if high is not None:
+                    rows &= column <= high
+        selected = np.flatnonzero(rows)
+
+        scores = self.rank_scores(rank, selected) if rank else None
+        # np.lexsort sorts by its last key first, so keys are added in reverse priority
+        keys = []
+        for field, descending in reversed(sort or []):
+            column = self.matrix[selected, self.columns[self.check_fields([field])[0]]]
+            missing = np.isnan(column)
+            keys.append(np.where(missing, 0.0, -column if descending else column))
+            keys.append(missing)
+        if scores is not None:
+            keys.append(-scores)
+        order = selected[np.lexsort(keys)] if keys else selected
+        if scores is not None:
+            score_of = dict(zip(selected.tolist(), scores.tolist()))
+        if limit is not None:
+            order = order[:limit]
+
+        results = []
+        for row in order.tolist():
+            result = {"model": self.models[row], "specs": self.specs_of(row)}
+            if scores is not None:
+                result["score"] = round(score_of[row], 4)
+            results.append(result)
+        return results
+
+    def specs_of(self, row: int, fields: Optional[List[str]] = None) -> Dict[str, Optional[float]]:
+        values = self.matrix[row]
+        return {field: None if np.isnan(values[self.columns[field]]) else float(values[self.columns[field]])
+                for field in (fields or self.fields)}
+
+    def compare(self, models: List[str], fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Side-by-side specs of the given models and which of them is best on each spec"""
+        self.row_mask(models)
+        rows = [self.rows[model] for model in models]
+        fields = self.check_fields(fields or self.fields)
+        values = self.matrix[np.ix_(rows, [self.columns[field] for field in fields])]
+        best = {}
+        for position, field in enumerate(fields):
+            column = values[:, position]
+            if len(column) and not np.isnan(column).all():
+                winner = np.nanargmax(column) if SPEC_FIELDS[field][1] else np.nanargmin(column)
+                best[field] = models[winner]
+        return {
+            "models": models,
+            "fields": {field: {"unit": SPEC_FIELDS[field][0], "higher_is_better": SPEC_FIELDS[field][1]}
+                       for field in fields},
+            "specs": {model: self.specs_of(row, fields) for model, row in zip(models, rows)},
+            "best": best
+        }
+
+
+_spec_stores: "weakref.WeakKeyDictionary[Any, SpecStore]" = weakref.WeakKeyDictionary()
+
+
+def get_spec_store(catalog) -> SpecStore:
+    """Spec matrix for a catalog, parsed once per catalog instance"""
+    store = _spec_stores.get(catalog)
+    if store is None:
+        store = _spec_stores[catalog] = SpecStore(catalog)
+    return store
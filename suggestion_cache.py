@@ -0,0 +1,187 @@
+"""
+Gemini Suggestion Cache
+SQLite-backed store of AI configuration suggestions keyed on model, catalog
+version, normalized preference text and the full current configuration, so
+repeated requests skip the Gemini call. Entries expire after a TTL and the
+least recently used ones are evicted past a size bound; the file can be
+shared by several worker processes. Identical requests that arrive while
+a call is still running share its Future through SingleFlight.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS suggestions (
+    key TEXT PRIMARY KEY,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL,
+    value TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS suggestions_accessed ON suggestions (accessed);
+CREATE INDEX IF NOT EXISTS suggestions_created ON suggestions (created);
+"""
+
+
+def normalize_preferences(text: str) -> str:
+    """Preference text with case, surrounding punctuation and runs of whitespace ignored"""
+    return " ".join(text.lower().split()).strip(" .!?")
+
+
+def normalize_config(value: Any) -> Any:
+    """A copy of a request's current_config with dict keys and list items in a stable order
+
+    Every value is kept as sent (the template posts option codes such as
+    upholstery: "Dakota_Black" and package: [...]), so different selections never
+    look alike; only the order in which they were sent is ignored.
+    """
+    if isinstance(value, dict):
+        return {str(key): normalize_config(item) for key, item in sorted(value.items(), key=lambda pair: str(pair[0]))}
+    if isinstance(value, (list, tuple)):
+        items = [normalize_config(item) for item in value]
+        return sorted(items, key=lambda item: json.dumps(item, sort_keys=True, default=str))
+    return value
+
+
+def suggestion_key(model_name: str, catalog_version: str, preferences: str, current_config: Any) -> Optional[str]:
+    """Cache key of one suggestion request; None when current_config is not an object"""
+    if not isinstance(current_config, dict):
+        return None
+    payload = json.dumps([model_name, catalog_version, normalize_preferences(preferences),
+                          normalize_config(current_config)], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SuggestionCache:
+    """Persistent suggestion cache with TTL expiry and least-recently-used eviction"""
+
+    def __init__(self, path: str, ttl: float = 86400, max_entries: int = 10000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.expired = self.evictions = 0
+        if self.enabled:
+            with self._connection() as connection:
+                connection.executescript(SCHEMA)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path) and self.max_entries > 0
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread; WAL lets workers read while another writes"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5.0)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _count(self, **counters: int) -> None:
+        with self._lock:
+            for name, amount in counters.items():
+                setattr(self, name, getattr(self, name) + amount)
+
+    def get(self, key: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Cached suggestion for key, or None when missing or expired"""
+        if key is None or not self.enabled:
+            return None
+        now = time.time()
+        try:
+            with self._connection() as connection:
+                row = connection.execute("SELECT created, value FROM suggestions WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self._count(misses=1)
+                    return None
+                created, value = row
+                if now - created > self.ttl:
+                    connection.execute("DELETE FROM suggestions WHERE key = ?", (key,))
+                    self._count(misses=1, expired=1)
+                    return None
+                connection.execute("UPDATE suggestions SET accessed = ? WHERE key = ?", (now, key))
+        except sqlite3.Error as e:
+            logger.error(f"Suggestion cache read failed: {e}")
+            return None
+        self._count(hits=1)
+        return json.loads(value)
+
+    def put(self, key: Optional[str], suggestion: Dict[str, Any]) -> None:
+        """Store a suggestion, evicting the least recently used entries past max_entries"""
+        if key is None or not self.enabled:
+            return
+        now = time.time()
+        try:
+            with self._connection() as connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO suggestions (key, created, accessed, value) VALUES (?, ?, ?, ?)",
+                    (key, now, now, json.dumps(suggestion)))
+                connection.execute("DELETE FROM suggestions WHERE created < ?", (now - self.ttl,))
+                excess = connection.execute("SELECT COUNT(*) FROM suggestions").fetchone()[0] - self.max_entries
+                if excess > 0:
+                    connection.execute(
+                        "DELETE FROM suggestions WHERE key IN "
+                        "(SELECT key FROM suggestions ORDER BY accessed LIMIT ?)", (excess,))
+                    self._count(evictions=excess)
+        except sqlite3.Error as e:
+            logger.error(f"Suggestion cache write failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        entries = 0
+        if self.enabled:
+            try:
+                entries = self._connection().execute("SELECT COUNT(*) FROM suggestions").fetchone()[0]
+            except sqlite3.Error:
+                entries = None
+        with self._lock:
+            return {
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "evictions": self.evictions
+            }
+
+
+class SingleFlight:
+    """One running call per key; requests with the same key share its Future instead of starting another"""
+
+    def __init__(self):
+        self._flights: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.calls = self.shared = 0
+
+    def join(self, key: Optional[str], start: Callable[[], Future]) -> Future:
+        """Future of the call already running for key, or of a new one from start(); a None key always starts"""
+        if key is None:
+            return start()
+        with self._lock:
+            future = self._flights.get(key)
+            if future is not None:
+                self.shared += 1
+                return future
+            future = self._flights[key] = start()
+            self.calls += 1
+        future.add_done_callback(lambda done: self._finish(key, done))
+        return future
+
+    def _finish(self, key: str, future: Future) -> None:
+        with self._lock:
+            if self._flights.get(key) is future:
+                del self._flights[key]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"in_flight": len(self._flights), "calls": self.calls, "saved_calls": self.shared}
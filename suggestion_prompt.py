@@ -0,0 +1,177 @@
+"""
+Gemini Suggestion Prompts
+The model-dependent part of the suggestion prompt (model facts, option tables,
+constraints, model notes and the answer format) compiled once per model and
+catalog into a compact tabular prefix; each request only appends its
+preferences and current configuration
+"""
+
+import json
+import threading
+import weakref
+from typing import Dict, List, Any, Callable, Iterable, NamedTuple, Optional
+
+from suggestion_cache import normalize_config
+
+# (allowed_codes kind, table title, extra column shown after the price)
+OPTION_TABLES = (
+    ("engines", "ENGINES", "power"),
+    ("drivetrains", "DRIVETRAINS", None),
+    ("exterior_colors", "EXTERIOR COLORS", None),
+    ("wheel_options", "WHEELS", None),
+    ("interior_options", "INTERIOR", None),
+    ("packages", "PACKAGES", None),
+    ("individual_options", "INDIVIDUAL OPTIONS", None),
+)
+
+# Preference analysis flag -> word used in the prompt
+FOCUS_LABELS = {
+    "budget_conscious": "budget",
+    "performance_oriented": "performance",
+    "luxury_oriented": "luxury",
+    "tech_savvy": "technology",
+    "family_oriented": "family",
+    "eco_conscious": "eco",
+}
+
+ANSWER_FORMAT = """{"recommended_config":{"engine":code,"drivetrain":code,"exterior_color":code,"wheels":code,"interior":code,"packages":[codes],"individual_options":[codes]},
+"reasoning":{"engine":str,"drivetrain":str,"color":str,"interior":str,"packages":str,"overall":str},
+"price_estimate":{"base_price":%(base_price)s,"engine_cost":n,"drivetrain_cost":n,"color_cost":n,"interior_cost":n,"packages_cost":n,"options_cost":n,"estimated_total":n},
+"alternatives":{"budget_option":str,"performance_option":str,"luxury_option":str},
+"warnings":[str]}"""
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough Gemini token count (about four characters per token), for logging prompt sizes"""
+    return (len(text) + 3) // 4
+
+
+def amount(value: Any) -> str:
+    """A price without thousands separators or a pointless ".0" (1200.0 -> "1200")"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return str(value)
+    return str(int(number)) if number.is_integer() else str(number)
+
+
+def option_table(title: str, options: Dict[str, Any], extra: Optional[str] = None) -> str:
+    """One option kind as "code|price[|extra][|name]" rows; the name is left out when it is just the code"""
+    if not options:
+        return f"{title}: none"
+    columns = "code|price" + (f"|{extra}" if extra else "") + "|name"
+    rows = [f"{title} ({columns}):"]
+    for code, details in options.items():
+        row = [code, amount(details.get("price", 0))]
+        if extra:
+            row.append(str(details.get(extra, "")))
+        name = details.get("name")
+        if name and name != code.replace("_", " "):
+            row.append(name)
+        rows.append("|".join(row))
+    return "\n".join(rows)
+
+
+def compact_constraints(constraints: Dict[str, Any], offered: Iterable[str]) -> str:
+    """Constraints that can affect this model's options, one line per constraint kind"""
+    offered = set(offered)
+    lines = []
+    engine_drivetrain = [
+        f"{engine}={','.join(drivetrain for drivetrain in drivetrains if drivetrain in offered)}"
+        for engine, drivetrains in constraints.get("engine_drivetrain", {}).items() if engine in offered
+    ]
+    if engine_drivetrain:
+        lines.append("Engine drivetrains: " + "; ".join(engine_drivetrain))
+    requires = [
+        f"{package}>{'+'.join(dependencies)}"
+        for package, dependencies in constraints.get("package_dependencies", {}).items() if package in offered
+    ]
+    if requires:
+        lines.append("Requires (a>b): " + "; ".join(requires))
+    # A conflict can only bite when the model offers every option in it
+    conflicts = [
+        "+".join(rule.get("options", []))
+        for rule in constraints.get("incompatible_options", [])
+        if rule.get("options") and offered.issuperset(rule["options"])
+    ]
+    if conflicts:
+        lines.append("Never combine: " + "; ".join(conflicts))
+    return "\n".join(lines) if lines else "No specific constraints."
+
+
+def build_prompt_prefix(model_name: str, model_data: Dict[str, Any], allowed_codes: Dict[str, Dict[str, Any]],
+                        constraints: Dict[str, Any], recommendations: str) -> str:
+    """The static part of a suggestion prompt for one model"""
+    base_price = model_data.get("base_price", 50000)
+    facts = {
+        key: model_data[key] for key in ("category", "body_style", "performance", "fuel_economy") if model_data.get(key)
+    }
+    offered = [code for options in allowed_codes.values() for code in options]
+    sections: List[str] = [
+        f"You are a BMW expert consultant helping a customer configure their {model_name}.",
+        f"MODEL: {model_name}, base price {amount(base_price)} USD; " + json.dumps(facts, separators=(",", ":")),
+        "OPTIONS (prices in USD; use ONLY these codes):",
+    ]
+    sections.extend(option_table(title, allowed_codes.get(kind, {}), extra) for kind, title, extra in OPTION_TABLES)
+    sections.append("CONSTRAINTS:\n" + compact_constraints(constraints, offered))
+    sections.append("MODEL NOTES:\n" + recommendations)
+    sections.append(
+        "Answer with ONLY this JSON (code = an option code above copied exactly, not a display name; "
+        "null when no option fits; str = short explanation; n = USD amount):\n"
+        + ANSWER_FORMAT % {"base_price": amount(base_price)}
+    )
+    return "\n\n".join(sections)
+
+
+def request_tail(user_preferences: str, preference_analysis: Dict[str, bool], current_config: Any) -> str:
+    """The per-request end of a suggestion prompt"""
+    focus = [label for flag, label in FOCUS_LABELS.items() if preference_analysis.get(flag)]
+    # Every selected value as sent, in a stable order so equal selections give equal prompts
+    current = normalize_config(current_config) if isinstance(current_config, dict) else {}
+    return (
+        f"CUSTOMER PREFERENCES: {json.dumps(user_preferences)}\n"
+        f"DETECTED FOCUS: {', '.join(focus) or 'none'}\n"
+        f"CURRENT CONFIGURATION: {json.dumps(current, sort_keys=True, separators=(',', ':'), default=str)}"
+    )
+
+
+class PromptPrefix(NamedTuple):
+    """Everything a suggestion request needs that only depends on the model and catalog"""
+    model_data: Dict[str, Any]
+    allowed_codes: Dict[str, Dict[str, Any]]
+    text: str
+    tokens: int
+
+
+class PromptPrefixCache:
+    """Compiled prompt prefixes per catalog instance and model"""
+
+    def __init__(self):
+        self._prefixes: "weakref.WeakKeyDictionary[Any, Dict[str, PromptPrefix]]" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, catalog, model_name: str, build: Callable[[], PromptPrefix]) -> PromptPrefix:
+        """Cached prefix for a catalog model; models outside the catalog are built every time"""
+        if model_name not in catalog.models_data:
+            return build()
+        with self._lock:
+            prefix = self._prefixes.get(catalog, {}).get(model_name)
+            if prefix is not None:
+                self.hits += 1
+                return prefix
+            self.misses += 1
+        prefix = build()
+        with self._lock:
+            self._prefixes.setdefault(catalog, {})[model_name] = prefix
+        return prefix
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            prefixes = [prefix for models in self._prefixes.values() for prefix in models.values()]
+            return {
+                "entries": len(prefixes),
+                "hits": self.hits,
+                "misses": self.misses,
+                "prefix_tokens": sum(prefix.tokens for prefix in prefixes)
+            }
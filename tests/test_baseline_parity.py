@@ -0,0 +1,62 @@
+"""Validation and pricing against results recorded from the original dict-based implementation"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from batch_engine import price_batch, validate_batch
+from car_configurator import CarConfigurator
+from catalog_store import get_catalog
+
+BASELINE = json.loads((Path(__file__).parent / "data" / "baseline_results.json").read_text())
+
+# Price breakdown fields added after the baseline was recorded
+ADDED_PRICE_FIELDS = ("applied_discounts",)
+
+
+def as_json(value):
+    return json.loads(json.dumps(value))
+
+
+def baseline_price(price):
+    return {key: value for key, value in as_json(price).items() if key not in ADDED_PRICE_FIELDS}
+
+
+def batch_result(result):
+    result = as_json(result)
+    result.pop("index")
+    result.pop("model")
+    return result
+
+
+def test_baseline_covers_every_rule_family():
+    errors = {error["type"] for row in BASELINE for error in row["validation"]["errors"]}
+    assert {"engine_drivetrain_incompatible", "missing_required_packages", "missing_required_options",
+            "incompatible_options", "model_required_options", "model_excluded_options"} <= errors
+    assert any(row["validation"]["valid"] for row in BASELINE)
+
+
+@pytest.mark.parametrize("row", BASELINE, ids=lambda row: row["model"])
+def test_scalar_results_match_the_baseline(row):
+    catalog = get_catalog()
+    assert as_json(catalog.validate_configuration(row["model"], row["configuration"])) == row["validation"]
+    assert baseline_price(catalog.calculate_total_price(row["model"], row["configuration"])) == row["price"]
+
+
+def test_cached_results_match_the_baseline():
+    configurator = CarConfigurator()
+    for _ in range(2):
+        for row in BASELINE:
+            assert as_json(configurator.validate_configuration(row["model"], row["configuration"])) == row["validation"]
+            assert baseline_price(configurator.calculate_price(row["model"], row["configuration"])) == row["price"]
+
+
+def test_batch_results_match_the_baseline():
+    catalog = get_catalog()
+    rows = [(row["model"], row["configuration"]) for row in BASELINE]
+    for result, row in zip(validate_batch(catalog, rows), BASELINE):
+        expected = {key: value for key, value in row["validation"].items() if key != "suggestions"}
+        assert batch_result(result) == expected
+    for result, row in zip(price_batch(catalog, rows), BASELINE):
+        assert baseline_price(batch_result(result)) == row["price"]
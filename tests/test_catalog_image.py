@@ -0,0 +1,90 @@
+import json
+import os
+import threading
+
+import pytest
+
+import catalog_image
+from batch_engine import get_batch_pricer, price_batch, validate_batch
+from bmw_configurator_data import BMWConfiguratorData
+from catalog_image import CatalogImage, get_catalog_image, write_image
+from catalog_store import main, open_snapshot
+
+CONFIGURATIONS = [
+    ("X5", {"engine": "B58_3_0T", "drivetrain": "xDrive", "M_Sport_Package": True, "Sport_Suspension": True}),
+    ("3 Series", {"engine": "B48_2_0T", "Premium_Package": True, "Executive_Package": True}),
+    ("Nope", {"engine": "B58_3_0T"}),
+]
+
+
+@pytest.fixture(scope="module")
+def image_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("catalog") / "catalog.cimg")
+    write_image(path, BMWConfiguratorData())
+    return path
+
+
+def test_batch_results_from_the_mapped_arrays_match(image_path, monkeypatch):
+    monkeypatch.setattr(catalog_image, "CATALOG_IMAGE_PATH", image_path)
+    mapped = BMWConfiguratorData()
+    assert get_catalog_image(mapped).matches(mapped)
+    assert not get_batch_pricer(mapped).prices.flags.writeable
+    monkeypatch.setattr(catalog_image, "CATALOG_IMAGE_PATH", None)
+    built = BMWConfiguratorData()
+    assert get_catalog_image(built) is None
+    assert list(validate_batch(mapped, CONFIGURATIONS)) == list(validate_batch(built, CONFIGURATIONS))
+    assert list(price_batch(mapped, CONFIGURATIONS)) == list(price_batch(built, CONFIGURATIONS))
+
+
+def test_image_of_another_catalog_is_ignored(image_path, monkeypatch):
+    monkeypatch.setattr(catalog_image, "CATALOG_IMAGE_PATH", image_path)
+    tables = BMWConfiguratorData.builtin_tables()
+    tables["pricing"]["engines"]["B58_3_0T"]["price"] += 1
+    catalog = BMWConfiguratorData(tables)
+    assert get_catalog_image(catalog) is None
+    expected = catalog.calculate_total_price(*CONFIGURATIONS[0])["total_msrp"]
+    assert list(price_batch(catalog, CONFIGURATIONS))[0]["total_msrp"] == expected
+
+
+def test_unreadable_image_is_ignored(tmp_path, monkeypatch):
+    path = tmp_path / "broken.cimg"
+    path.write_bytes(b"NOTANIMG")
+    monkeypatch.setattr(catalog_image, "CATALOG_IMAGE_PATH", str(path))
+    assert get_catalog_image(BMWConfiguratorData()) is None
+    with pytest.raises(ValueError):
+        CatalogImage(str(path))
+
+
+def test_images_are_not_catalog_snapshots(image_path):
+    with pytest.raises(ValueError):
+        open_snapshot(image_path)
+
+
+def test_export_compiles_a_json_snapshot_into_an_image(tmp_path):
+    snapshot, image = str(tmp_path / "catalog.json"), str(tmp_path / "catalog.cimg")
+    assert main(["export", snapshot]) == 0
+    assert main(["export", image, "--source", snapshot]) == 0
+    with open(snapshot) as handle:
+        assert json.load(handle)["format"] == 1
+    assert CatalogImage(image).matches(open_snapshot(snapshot)[1]())
+
+
+def test_concurrent_exports_do_not_share_a_temp_file(tmp_path):
+    path = str(tmp_path / "catalog.cimg")
+    catalog = BMWConfiguratorData()
+    errors = []
+
+    def export():
+        try:
+            write_image(path, catalog)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=export) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert CatalogImage(path).matches(catalog)
+    assert os.listdir(tmp_path) == ["catalog.cimg"]
@@ -0,0 +1,53 @@
+import json
+import pickle
+import sys
+
+import pytest
+
+from catalog_model import CatalogInterner, FrozenDict, freeze
+from catalog_store import get_catalog
+from option_symbols import get_symbol_table
+
+
+def test_interner_shares_equal_tables_and_keeps_types_apart():
+    interner = CatalogInterner()
+    first = interner.freeze({"colors": ["Alpine_White", "Black_Sapphire"], "price": 0})
+    second = interner.freeze({"colors": ["Alpine_White", "Black_Sapphire"], "price": 0})
+    assert first is second
+    assert isinstance(first, FrozenDict) and first["colors"] == ("Alpine_White", "Black_Sapphire")
+    assert interner.freeze({"flag": True}) is not interner.freeze({"flag": 1})
+
+
+def test_frozen_views_are_read_only_and_serializable():
+    view = freeze({"engines": {"B58": {"price": 5000}}, "codes": ["a"]})
+    with pytest.raises(TypeError):
+        view["engines"] = {}
+    with pytest.raises(TypeError):
+        view["engines"].update(B58=None)
+    assert json.loads(json.dumps(view)) == {"engines": {"B58": {"price": 5000}}, "codes": ["a"]}
+
+
+def test_frozen_views_are_slotted_and_cannot_be_refilled():
+    view = FrozenDict({"price": 5000})
+    assert not hasattr(view, "__dict__")
+    assert sys.getsizeof(view) == sys.getsizeof({"price": 5000})
+    view.__init__({"price": 0})
+    assert view == {"price": 5000}
+    assert pickle.loads(pickle.dumps(view)) == view
+
+
+def test_catalog_tables_are_frozen_and_shared():
+    catalog = get_catalog()
+    assert isinstance(catalog.pricing, FrozenDict)
+    assert not hasattr(catalog, "records")
+    colours = [catalog.get_available_options(model)["exterior_colors"] for model in catalog.models_data]
+    assert len({id(table) for table in colours}) < len(colours)
+
+
+def test_symbol_table_reads_names_from_the_catalog_tables():
+    catalog = get_catalog()
+    symbols = get_symbol_table(catalog)
+    engine, details = next(iter(catalog.pricing["engines"].items()))
+    assert symbols.name_of("engines", engine) == details["name"]
+    assert symbols.resolve("engines", details["name"]).code == engine
+    assert symbols.resolve("packages", "m sport").code == "M_Sport_Package"
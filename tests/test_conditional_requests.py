@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+os.environ["GEMINI_CACHE_PATH"] = ""
+
+import app  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    return app.app.test_client()
+
+
+def etag_of(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    return response.headers["ETag"]
+
+
+@pytest.mark.parametrize("url", [
+    "/api/series?max_price=cheap",
+    "/api/models/SUVs?min_price=nan",
+    "/api/models/search?horsepower_min=lots",
+    "/api/models/search?sort=colour",
+    "/api/models/search?compare=1&models=X5,Nope",
+    "/api/options/X5?order_date=someday",
+])
+def test_malformed_arguments_get_400_even_with_a_matching_etag(client, url):
+    etag = etag_of(client, "/api/series")
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+@pytest.mark.parametrize("url", [
+    "/api/series?max_price=60000",
+    "/api/models/search?sort=-horsepower&limit=3",
+    "/api/options/X5?order_date=2025-01",
+])
+def test_well_formed_arguments_still_get_304(client, url):
+    etag = etag_of(client, url)
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
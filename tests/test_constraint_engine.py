@@ -0,0 +1,57 @@
+import pytest
+
+from constraint_engine import CompiledConstraints, OptionIndex
+
+CONSTRAINTS = {
+    "engine_drivetrain": {"B48": ["RWD"], "B58": ["RWD", "xDrive"]},
+    "package_dependencies": {"M_Sport_Package": ["Premium_Package", "Technology_Package"], "Sunroof": ["Premium_Package"]},
+    "incompatible_options": [{"options": ["Sport_Seats", "Comfort_Seats"], "reason": "one seat type"}],
+    "required_combinations": [{"base": "Sport_Exhaust", "requires": ["Sport_Suspension"], "reason": "exhaust needs it"}],
+    "model_specific": {"required_options": ["Run_Flat_Tires"], "excluded_options": ["Tow_Hitch"]},
+}
+
+
+@pytest.fixture
+def compiled():
+    return CompiledConstraints("Test", CONSTRAINTS, OptionIndex())
+
+
+def error_types(errors):
+    return [error["type"] for error in errors]
+
+
+def test_option_index_interns_codes_to_stable_bits():
+    index = OptionIndex(["a", "b"])
+    assert index.intern("a") == 0 and index.intern("c") == 2 and len(index) == 3
+    assert index.mask_of(["a", "c"]) == 0b101
+    assert index.codes_in(0b101, ["c", "b", "a"]) == ["c", "a"]
+    assert index.selection_mask({"a": True, "b": False, "c": "yes", "unknown": True}) == 0b101
+
+
+def test_valid_configuration_has_no_errors(compiled):
+    configuration = {"engine": "B58", "drivetrain": "xDrive", "Run_Flat_Tires": True, "Sport_Seats": True}
+    assert compiled.errors(configuration) == []
+
+
+def test_every_rule_family_reports_its_error(compiled):
+    configuration = {"engine": "B48", "drivetrain": "xDrive", "M_Sport_Package": True, "Sport_Seats": True,
+                     "Comfort_Seats": True, "Sport_Exhaust": True, "Tow_Hitch": True}
+    errors = compiled.errors(configuration)
+    assert error_types(errors) == ["engine_drivetrain_incompatible", "missing_required_packages",
+                                   "incompatible_options", "missing_required_options",
+                                   "model_required_options", "model_excluded_options"]
+    assert errors[0]["available_drivetrains"] == ["RWD"]
+    assert errors[1]["missing_packages"] == ["Premium_Package", "Technology_Package"]
+
+
+def test_only_package_keys_trigger_dependency_checks(compiled):
+    assert "missing_required_packages" not in error_types(compiled.errors({"Sunroof": True, "Run_Flat_Tires": True}))
+
+
+def test_package_errors_follow_configuration_order():
+    constraints = dict(CONSTRAINTS, package_dependencies={"A_Package": ["X"], "B_Package": ["Y"]})
+    compiled = CompiledConstraints("Test", constraints, OptionIndex())
+    for order in (["A_Package", "B_Package"], ["B_Package", "A_Package"]):
+        errors = compiled.package_errors(compiled.index.selection_mask(dict.fromkeys(order, True)),
+                                         dict.fromkeys(order, True))
+        assert [error["message"].split()[1] for error in errors] == order
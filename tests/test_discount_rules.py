@@ -0,0 +1,54 @@
+import pytest
+
+from catalog_store import get_catalog
+from constraint_engine import OptionIndex
+from discount_rules import CompiledDiscounts
+
+RULES = [
+    {"id": "combo", "description": "Combo", "amount": 500, "all_of": ["Premium_Package", "Technology_Package"]},
+    {"id": "two_of", "amount": 300, "any_of": ["A_Option", "B_Option", "C_Option"], "min_any": 2},
+    {"id": "bulk", "amount": 200, "min_packages": 3},
+]
+
+
+@pytest.fixture
+def discounts():
+    return CompiledDiscounts(RULES, OptionIndex())
+
+
+def rule_ids(discounts, configuration):
+    return [applied["rule"] for applied in discounts.evaluate(configuration)[1]]
+
+
+def test_all_of_any_of_and_package_count_rules(discounts):
+    assert discounts.evaluate({"Premium_Package": True}) == (0, [])
+    assert rule_ids(discounts, {"Premium_Package": True, "Technology_Package": True}) == ["combo"]
+    assert rule_ids(discounts, {"A_Option": True, "C_Option": True}) == ["two_of"]
+    assert rule_ids(discounts, {"A_Option": True, "C_Option": False}) == []
+    total, applied = discounts.evaluate({"Premium_Package": True, "Technology_Package": True, "X_Package": True})
+    assert total == 700 and [rule["rule"] for rule in applied] == ["combo", "bulk"]
+    assert applied[1] == {"rule": "bulk", "description": "bulk", "amount": 200}
+
+
+def test_state_key_covers_everything_a_discount_depends_on(discounts):
+    assert discounts.state_key({"A_Option": True, "Sunroof": True, "X_Package": True, "B_Option": False}) == {
+        "A_Option", "X_Package"}
+
+
+@pytest.mark.parametrize("rules", [
+    [{"amount": 100}],
+    [{"id": "a", "amount": 100}, {"id": "a", "amount": 50}],
+    [{"id": "a", "amount": -1}],
+    [{"id": "a", "amount": True}],
+])
+def test_malformed_rules_are_rejected(rules):
+    with pytest.raises(ValueError):
+        CompiledDiscounts(rules, OptionIndex())
+
+
+def test_catalog_prices_report_the_rules_that_fired():
+    catalog = get_catalog()
+    configuration = {"Premium_Package": True, "Technology_Package": True, "M_Sport_Package": True}
+    breakdown = catalog.calculate_total_price("5 Series", configuration)
+    assert [rule["rule"] for rule in breakdown["applied_discounts"]] == ["premium_technology_combo", "multi_package"]
+    assert breakdown["package_discount"] == 700
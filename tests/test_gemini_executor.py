@@ -0,0 +1,44 @@
+import socket
+import ssl
+
+import pytest
+
+from gemini_executor import socket_closed
+
+
+@pytest.fixture
+def pair():
+    left, right = socket.socketpair()
+    yield left, right
+    left.close()
+    right.close()
+
+
+def test_open_connections_are_not_closed(pair):
+    left, right = pair
+    assert not socket_closed(left)
+    right.sendall(b"GET / HTTP/1.1\r\n")
+    assert not socket_closed(left)
+
+
+def test_closed_peer_is_detected(pair):
+    left, right = pair
+    right.close()
+    assert socket_closed(left)
+
+
+def test_tls_sockets_are_never_reported_closed(pair):
+    left, right = pair
+    # How a TLS server (werkzeug ssl_context, gunicorn certfile) hands the request its socket
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    wrapped = context.wrap_socket(left, server_side=True, do_handshake_on_connect=False)
+    try:
+        right.sendall(b"\x17\x03\x03\x00\x01x")  # a readable TLS record from a connected client
+        assert not socket_closed(wrapped)
+    finally:
+        wrapped.detach()
+
+
+def test_unknown_sockets_are_not_closed():
+    assert not socket_closed(None)
+    assert not socket_closed(object())
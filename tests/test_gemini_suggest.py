@@ -0,0 +1,69 @@
+import os
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+os.environ["GEMINI_CACHE_PATH"] = ""
+
+import app  # noqa: E402
+
+
+class FakeGemini:
+    """Slow Gemini stand-in that records the prompts it was asked"""
+
+    def __init__(self, delay=0.3):
+        self.delay = delay
+        self.prompts = []
+        self.lock = threading.Lock()
+
+    def generate_content(self, prompt, **kwargs):
+        with self.lock:
+            self.prompts.append(prompt)
+        time.sleep(self.delay)
+        return types.SimpleNamespace(text='{"recommended_config": {"engine": "B58_3_0T"}, "reasoning": {}}',
+                                     usage_metadata=None)
+
+
+@pytest.fixture
+def gemini(monkeypatch):
+    fake = FakeGemini()
+    generation_types = types.ModuleType("google.generativeai.types")
+    generation_types.GenerationConfig = lambda **kwargs: kwargs
+    monkeypatch.setitem(sys.modules, "google.generativeai.types", generation_types)
+    monkeypatch.setattr(app, "get_gemini_model", lambda: fake)
+    return fake
+
+
+def post_concurrently(bodies):
+    results = [None] * len(bodies)
+
+    def post(index, body):
+        results[index] = app.app.test_client().post("/api/gemini/suggest", json=body)
+
+    threads = [threading.Thread(target=post, args=item) for item in enumerate(bodies)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_identical_requests_share_one_call(gemini):
+    body = {"preferences": "sporty", "model": "X5", "current_config": {"upholstery": "Dakota_Black"}}
+    responses = post_concurrently([body, body])
+    assert [response.status_code for response in responses] == [200, 200]
+    assert len(gemini.prompts) == 1
+
+
+def test_different_selections_do_not_share_a_call(gemini):
+    responses = post_concurrently([
+        {"preferences": "sporty", "model": "X5",
+         "current_config": {"upholstery": "Vernasca_Leather", "package": ["M_Sport_Package", "Premium_Package"]}},
+        {"preferences": "sporty", "model": "X5",
+         "current_config": {"upholstery": "SensaTec", "package": ["Technology_Package"]}},
+    ])
+    assert [response.status_code for response in responses] == [200, 200]
+    assert len(gemini.prompts) == 2
@@ -0,0 +1,52 @@
+import json
+import random
+
+from incremental_json import JsonFieldStream
+
+DOCUMENT = {
+    "recommended_config": {"engine": "B58_3_0T", "packages": ["M_Sport_Package", "Premium_Package"],
+                           "wheels": None, "note": "quote \" and \\ and, commas}", "count": 2},
+    "reasoning": {"engine": "Strong {balanced} choice", "overall": "Fits the brief"},
+    "price_estimate": {"estimated_total": 71995.5},
+    "warnings": ["none"],
+}
+WATCHED = ("recommended_config", "reasoning")
+EXPECTED = [(section, field, value) for section in WATCHED for field, value in DOCUMENT[section].items()]
+
+
+def scan(text, chunk_sizes):
+    stream = JsonFieldStream(WATCHED)
+    fields, position = [], 0
+    for size in chunk_sizes:
+        fields.extend(stream.feed(text[position:position + size]))
+        position += size
+    fields.extend(stream.feed(text[position:]))
+    return stream, fields
+
+
+def test_whole_document_reports_every_watched_member_in_order():
+    stream, fields = scan(json.dumps(DOCUMENT), [])
+    assert fields == EXPECTED and stream.finished
+
+
+def test_any_chunking_gives_the_same_members():
+    text = json.dumps(DOCUMENT, indent=2)
+    rnd = random.Random(5)
+    for _ in range(200):
+        sizes = [rnd.randint(1, 12) for _ in range(len(text))]
+        assert scan(text, sizes)[1] == EXPECTED
+
+
+def test_members_are_reported_as_soon_as_they_are_complete():
+    stream = JsonFieldStream(WATCHED)
+    assert stream.feed('{"recommended_config": {"engine": "B58') == []
+    assert stream.feed('_3_0T", "wheels"') == [("recommended_config", "engine", "B58_3_0T")]
+    assert stream.feed(": 20,") == [("recommended_config", "wheels", 20)]
+    assert not stream.finished
+
+
+def test_text_before_the_object_is_skipped_and_after_it_ignored():
+    text = "```json\n" + json.dumps(DOCUMENT) + "\n```"
+    stream, fields = scan(text, [3, 5, 7])
+    assert fields == EXPECTED and stream.finished
+    assert stream.feed('{"reasoning": {"late": 1}}') == []
@@ -0,0 +1,42 @@
+import json
+import random
+
+import pytest
+
+from catalog_store import get_catalog
+
+
+def test_delta_validation_matches_full_validation():
+    catalog = get_catalog()
+    codes = list(catalog.option_index.codes)
+    rnd = random.Random(7)
+    for model in catalog.models_data:
+        configuration = {"engine": rnd.choice(list(catalog.pricing["engines"]))}
+        state = catalog.start_incremental_validation(model, configuration)
+        errors = dict(state["errors"])
+        for _ in range(40):
+            option = rnd.choice(codes + ["engine", "drivetrain"])
+            if option == "engine":
+                value = rnd.choice(list(catalog.pricing["engines"]))
+            elif option == "drivetrain":
+                value = rnd.choice(list(catalog.pricing["drivetrains"]))
+            else:
+                value = rnd.random() < 0.6
+            configuration[option] = value
+            delta = catalog.validate_delta(state["token"], option, value)
+            errors.update(delta["errors"]["changed"])
+            for rule_id in delta["errors"]["resolved"]:
+                del errors[rule_id]
+            full = catalog.start_incremental_validation(model, configuration)
+            assert errors == full["errors"] and delta["valid"] == full["valid"]
+            state = delta
+
+
+def test_tampered_tokens_are_rejected():
+    catalog = get_catalog()
+    token = catalog.start_incremental_validation("X5", {"engine": "B58_3_0T"})["token"]
+    with pytest.raises(ValueError):
+        catalog.validate_delta(token[:-4] + "AAAA", "Sunroof", True)
+    with pytest.raises(ValueError):
+        catalog.validate_delta("not a token", "Sunroof", True)
+    assert json.dumps(catalog.validate_delta(token, "Sunroof", True))
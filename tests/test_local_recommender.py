@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+from catalog_store import get_catalog
+from local_recommender import get_local_recommender
+from price_index import get_price_index
+
+
+@pytest.fixture
+def recommender():
+    return get_local_recommender(get_catalog())
+
+
+def test_recommendations_are_valid_and_catalog_priced(recommender):
+    catalog = get_catalog()
+    index = get_price_index(catalog)
+    for model in catalog.models_data:
+        result = recommender.recommend(model, {"tech_savvy": True})
+        if index.get(model) is None:
+            assert result is None
+            continue
+        configuration = result["configuration"]
+        assert result["validation"] == catalog.validate_configuration(model, configuration)
+        assert result["validation"]["valid"]
+        assert result["price_breakdown"] == catalog.calculate_total_price(model, configuration)
+        assert index.get(model).min_price <= result["price_breakdown"]["total_msrp"] <= index.get(model).max_price
+        assert set(result["reasons"]) == set(recommender.selected_codes(configuration))
+
+
+def test_unknown_models_get_no_recommendation(recommender):
+    assert recommender.recommend("Nope", {}) is None
+    assert recommender.suggestion("Nope", {}) is None
+
+
+def test_recommendations_are_deterministic(recommender):
+    first = recommender.recommend("X5", {"performance_oriented": True, "family_oriented": True})
+    second = recommender.recommend("X5", {"family_oriented": True, "performance_oriented": True})
+    assert json.dumps(first, sort_keys=True) == json.dumps(second, sort_keys=True)
+
+
+def test_budget_focus_is_never_dearer_than_luxury_focus(recommender):
+    for model in ("X1", "X3", "X5", "3 Series", "5 Series", "7 Series"):
+        budget = recommender.recommend(model, {"budget_conscious": True})["price_breakdown"]["total_msrp"]
+        luxury = recommender.recommend(model, {"luxury_oriented": True})["price_breakdown"]["total_msrp"]
+        assert budget <= luxury
+
+
+def test_unknown_preference_themes_are_rejected(recommender):
+    with pytest.raises(ValueError):
+        recommender.recommend("X5", {"sporty": True})
+
+
+def test_suggestion_has_the_gemini_shape(recommender):
+    catalog = get_catalog()
+    suggestion = recommender.suggestion("X5", {"performance_oriented": True})
+    config = suggestion["recommended_config"]
+    assert suggestion["type"] == "local_recommendation"
+    assert set(config) == {"engine", "drivetrain", "exterior_color", "wheels", "interior", "packages",
+                           "individual_options"}
+    assert set(config["packages"]) <= set(catalog.pricing["packages"])
+    assert set(config["individual_options"]) <= set(catalog.pricing["individual_options"])
+    assert suggestion["price_estimate"]["estimated_total"] == suggestion["price_breakdown"]["total_msrp"]
+    assert {"engine", "packages", "overall"} <= set(suggestion["reasoning"])
+
+
+def test_options_estimate_excludes_the_destination_fee(recommender):
+    for model in ("X1", "X5", "7 Series"):
+        suggestion = recommender.suggestion(model, {"luxury_oriented": True})
+        breakdown = suggestion["price_breakdown"]
+        estimate = suggestion["price_estimate"]
+        option_columns = ("engine_cost", "drivetrain_cost", "color_cost", "interior_cost", "packages_cost",
+                          "options_cost")
+        assert estimate["estimated_options"] == (
+            sum(estimate[column] for column in option_columns) - breakdown["package_discount"])
+        assert estimate["estimated_options"] == (
+            breakdown["total_msrp"] - breakdown["destination_fee"] - breakdown["base_price"])
@@ -0,0 +1,51 @@
+import os
+
+os.environ["GEMINI_CACHE_PATH"] = ""
+
+import app  # noqa: E402
+from catalog_store import get_catalog  # noqa: E402
+from price_index import get_price_index  # noqa: E402
+
+
+def series_models(response):
+    return {series: info["models"] for series, info in response.get_json().items()}
+
+
+def test_no_bounds_return_every_listed_model():
+    client = app.app.test_client()
+    unfiltered = series_models(client.get("/api/series"))
+    assert "Z4" in unfiltered["Convertibles"] and "M8" in unfiltered["M Models"]
+    assert series_models(client.get("/api/series?min_price=&max_price=")) == unfiltered
+    assert client.get("/api/models/SUVs").get_json() == client.get("/api/models/SUVs?max_price=").get_json()
+
+
+def test_bounds_keep_only_priced_models_in_range():
+    client = app.app.test_client()
+    index = get_price_index(get_catalog())
+    suvs = client.get("/api/models/SUVs").get_json()["models"]
+    priced = [model for model in suvs if index.get(model)]
+    unpriced = [model for model in suvs if not index.get(model)]
+    assert priced and unpriced
+
+    cutoff = min(index.get(model).min_price for model in priced)
+    narrowed = client.get(f"/api/models/SUVs?max_price={cutoff - 1}").get_json()
+    assert narrowed["models"] == []
+    assert narrowed["unpriced_models"] == unpriced
+
+    everything = client.get("/api/models/SUVs?min_price=0&max_price=10000000").get_json()
+    assert everything["models"] == priced
+    assert everything["unpriced_models"] == unpriced
+    for model in priced:
+        assert everything["price_ranges"][model] == index.summary(model)
+
+
+def test_models_without_a_known_range_never_match_a_bound():
+    series = series_models(app.app.test_client().get("/api/series?max_price=30000"))
+    assert not any("M8" in models for models in series.values())
+    filtered = app.app.test_client().get("/api/series?max_price=30000").get_json()
+    assert "M8" in filtered["M Models"]["unpriced_models"]
+
+
+def test_malformed_bounds_are_rejected():
+    response = app.app.test_client().get("/api/series?min_price=cheap")
+    assert response.status_code == 400
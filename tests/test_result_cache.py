@@ -0,0 +1,85 @@
+import json
+import random
+from datetime import date
+
+from car_configurator import CarConfigurator
+from catalog_store import get_catalog
+from result_cache import ResultCache, fingerprint, selection_key
+
+
+def as_json(result):
+    return json.dumps(result)
+
+
+def test_selection_key_keeps_order_and_values_and_drops_unselected_keys():
+    assert selection_key({"wheels": "20_Inch", "engine": "B58", "Sunroof": "yes", "Heated_Seats": False}) == (
+        ("wheels", "20_Inch"), ("engine", "B58"), ("Sunroof", "yes"))
+    assert selection_key({"engine": "B58", "Sunroof": True}) != selection_key({"Sunroof": True, "engine": "B58"})
+
+
+def test_unhashable_values_and_non_string_keys_are_not_fingerprinted():
+    assert selection_key({"package": ["M_Sport_Package"]}) is None
+    assert selection_key({1: True}) is None
+    assert fingerprint("v1", "X5", {"package": ["M_Sport_Package"]}) is None
+    assert fingerprint("v1", "X5", "not a configuration") is None
+
+
+def test_fingerprint_depends_on_version_model_and_months():
+    key = fingerprint("v1", "X5", {"engine": "B58"}, date(2025, 1, 3))
+    assert key == fingerprint("v1", "X5", {"engine": "B58"}, date(2025, 1, 28))
+    assert key != fingerprint("v1", "X5", {"engine": "B58"}, date(2025, 2, 3))
+    assert key != fingerprint("v2", "X5", {"engine": "B58"}, date(2025, 1, 3))
+    assert key != fingerprint("v1", "X3", {"engine": "B58"}, date(2025, 1, 3))
+
+
+def test_result_cache_counts_hits_and_evicts_least_recently_used():
+    cache = ResultCache(max_entries=2)
+    keys = [fingerprint("v1", "X5", {"engine": engine}) for engine in ("a", "b", "c")]
+    calls = []
+    for key in keys[:2] + keys[:1] + keys[2:]:
+        cache.get_or_compute(key, lambda key=key: calls.append(key) or {"engine": key.selection})
+    assert calls == [keys[0], keys[1], keys[2]]
+    assert cache.stats()["hits"] == 1 and cache.stats()["evictions"] == 1
+    cache.get_or_compute(keys[1], lambda: calls.append(keys[1]) or {})
+    assert calls[-1] == keys[1]
+    assert cache.retain_version("v2") == 2
+
+
+def test_cached_results_match_the_catalog_for_reordered_configurations():
+    catalog = get_catalog()
+    configurator = CarConfigurator()
+    first = {"engine": "B58_3_0T", "Executive_Package": True, "M_Sport_Package": True, "Premium_Package": True}
+    second = dict(reversed(list(first.items())))
+    for configuration in (first, second):
+        assert as_json(configurator.calculate_price("5 Series", configuration)) == as_json(
+            catalog.calculate_total_price("5 Series", configuration))
+        assert as_json(configurator.validate_configuration("5 Series", configuration)) == as_json(
+            catalog.validate_configuration("5 Series", configuration))
+
+
+def test_cached_and_batch_results_match_the_catalog():
+    catalog = get_catalog()
+    configurator = CarConfigurator(cache_size=64)
+    codes = list(catalog.option_index.codes)
+    rnd = random.Random(19)
+    rows = []
+    for _ in range(500):
+        model = rnd.choice(list(catalog.models_data))
+        configuration = {code: rnd.choice([True, True, False, 1, "yes"]) for code in rnd.sample(codes, 8)}
+        configuration["engine"] = rnd.choice(list(catalog.pricing["engines"]))
+        items = list(configuration.items())
+        rnd.shuffle(items)
+        rows.append((model, dict(items)))
+    for model, configuration in rows + rows:
+        assert as_json(configurator.validate_configuration(model, configuration)) == as_json(
+            catalog.validate_configuration(model, configuration))
+        assert as_json(configurator.calculate_price(model, configuration)) == as_json(
+            catalog.calculate_total_price(model, configuration))
+
+    def shared(result):
+        return as_json({key: value for key, value in result.items() if key not in ("index", "model", "suggestions")})
+
+    for result, (model, configuration) in zip(configurator.validate_configurations(rows), rows):
+        assert shared(result) == shared(catalog.validate_configuration(model, configuration))
+    for result, (model, configuration) in zip(configurator.calculate_prices(rows), rows):
+        assert shared(result) == shared(catalog.calculate_total_price(model, configuration))
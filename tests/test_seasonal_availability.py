@@ -0,0 +1,66 @@
+import json
+import os
+from datetime import date
+
+os.environ["GEMINI_CACHE_PATH"] = ""
+
+import app  # noqa: E402
+import bmw_scraper  # noqa: E402
+import car_configurator  # noqa: E402
+from bmw_configurator_data import BMWConfiguratorData  # noqa: E402
+from constraint_engine import OptionIndex, SeasonalAvailability  # noqa: E402
+
+
+def test_seasonal_masks_block_by_order_and_production_month():
+    index = OptionIndex()
+    seasonal = SeasonalAvailability({"Winter_Tires": {"available_months": [10, 11, 12, 1, 2, 3]},
+                                     "Convertible_Top": {"production_months": [3, 4, 5]}}, index)
+    assert seasonal.blocked_codes(date(2025, 7, 1), None) == ["Winter_Tires"]
+    assert seasonal.blocked_codes(date(2025, 1, 1), date(2025, 6, 1)) == ["Convertible_Top"]
+    assert seasonal.blocked_codes(None, None) == []
+    selection = index.selection_mask({"Winter_Tires": True, "Convertible_Top": True})
+    errors = seasonal.errors(selection, date(2025, 7, 1), date(2025, 7, 1))
+    assert [(error["option"], error["message"]) for error in errors] == [
+        ("Winter_Tires", "Winter_Tires is not available for orders in July"),
+        ("Convertible_Top", "Convertible_Top is not available for production in July")]
+
+
+def seasonal_catalog():
+    """Built-in catalog with both tyre sets priced; on any date one of them is out of season"""
+    tables = BMWConfiguratorData.builtin_tables()
+    tables["pricing"]["individual_options"]["Winter_Tires"] = {"price": 1400}
+    tables["pricing"]["individual_options"]["Summer_Tires"] = {"price": 1200}
+    return BMWConfiguratorData(tables)
+
+
+def test_requests_without_dates_are_not_seasonally_checked(monkeypatch):
+    catalog = seasonal_catalog()
+    monkeypatch.setattr(app, "get_catalog", lambda: catalog)
+    monkeypatch.setattr(car_configurator, "get_catalog", lambda: catalog)
+    client = app.app.test_client()
+    body = {"model": "X5", "configuration": {"engine": "B58_3_0T", "Winter_Tires": True, "Summer_Tires": True}}
+
+    undated = client.post("/api/calculate-price", json=body).get_json()
+    assert "unavailable_options" not in undated
+    assert undated == client.post("/api/calculate-price", json=body).get_json()
+    summer = client.post("/api/calculate-price", json=dict(body, order_date="2025-07")).get_json()
+    assert summer["unavailable_options"] == ["Winter_Tires"]
+    assert summer["individual_options"] == undated["individual_options"] - 1400
+    assert undated["individual_options"] == 2600
+
+    validation = client.post("/api/validate-configuration", json=body).get_json()
+    assert "seasonal_unavailable" not in [error["type"] for error in validation["errors"]]
+    validation = client.post("/api/validate-configuration", json=dict(body, order_date="2025-07")).get_json()
+    assert "seasonal_unavailable" in [error["type"] for error in validation["errors"]]
+
+    rows = {"configurations": [body]}
+    priced = client.post("/api/calculate-price/batch", json=rows).get_data(as_text=True)
+    assert "unavailable_options" not in priced
+
+
+def test_priced_seasonal_options_reach_the_configurator(monkeypatch):
+    catalog = seasonal_catalog()
+    monkeypatch.setattr(bmw_scraper, "get_catalog", lambda: catalog)
+    options = app.bmw_scraper.get_options_for_model("X5")
+    assert "Winter_Tires" in json.dumps(options["individual_options"])
+    assert set(options["seasonal_availability"]) == {"Winter_Tires", "Summer_Tires", "Convertible_Top"}
@@ -0,0 +1,31 @@
+import os
+
+os.environ["GEMINI_CACHE_PATH"] = ""
+
+import app  # noqa: E402
+from spec_store import SPEC_FIELDS  # noqa: E402
+
+
+def search(query):
+    return app.app.test_client().get(f"/api/models/search?{query}")
+
+
+def test_filters_keep_models_within_the_bounds():
+    results = search("horsepower_min=300&sort=-horsepower").get_json()["results"]
+    assert results
+    assert all(result["specs"]["horsepower"] >= 300 for result in results)
+    horsepower = [result["specs"]["horsepower"] for result in results]
+    assert horsepower == sorted(horsepower, reverse=True)
+
+
+def test_unknown_filter_fields_are_rejected():
+    response = search("horsepwer_min=300")
+    assert response.status_code == 400
+    error = response.get_json()["error"]
+    assert error.startswith("Unknown spec fields: horsepwer")
+    assert all(field in error for field in SPEC_FIELDS)
+
+
+def test_unknown_sort_and_rank_fields_are_rejected():
+    assert search("sort=colour").status_code == 400
+    assert search("rank=colour:2").status_code == 400
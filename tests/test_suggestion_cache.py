@@ -0,0 +1,87 @@
+from concurrent.futures import Future
+
+from suggestion_cache import SingleFlight, SuggestionCache, normalize_config, suggestion_key
+
+
+def test_different_selections_get_different_keys():
+    first = {"upholstery": "Vernasca_Leather", "package": ["M_Sport_Package", "Premium_Package"]}
+    second = {"upholstery": "SensaTec", "package": ["Technology_Package"]}
+    assert suggestion_key("X5", "v1", "sporty", first) != suggestion_key("X5", "v1", "sporty", second)
+
+
+def test_single_value_changes_change_the_key():
+    for first, second in (({"upholstery": "Dakota_Black"}, {"upholstery": "Dakota_Cognac"}),
+                          ({"individual_option": ["Sunroof"]}, {"individual_option": ["Head_Up_Display"]})):
+        assert suggestion_key("X5", "v1", "sporty", first) != suggestion_key("X5", "v1", "sporty", second)
+
+
+def test_order_case_and_spacing_do_not_change_the_key():
+    first = {"upholstery": "Dakota_Black", "package": ["Premium_Package", "M_Sport_Package"]}
+    second = {"package": ["M_Sport_Package", "Premium_Package"], "upholstery": "Dakota_Black"}
+    key = suggestion_key("X5", "v1", "Sporty  and fast!", first)
+    assert key == suggestion_key("X5", "v1", "sporty and fast", second)
+
+
+def test_model_version_and_preferences_are_part_of_the_key():
+    key = suggestion_key("X5", "v1", "sporty", {})
+    assert key != suggestion_key("X3", "v1", "sporty", {})
+    assert key != suggestion_key("X5", "v2", "sporty", {})
+    assert key != suggestion_key("X5", "v1", "luxury", {})
+
+
+def test_non_object_configuration_is_not_cacheable():
+    assert suggestion_key("X5", "v1", "sporty", ["engine"]) is None
+
+
+def test_normalize_config_keeps_values():
+    assert normalize_config({"b": ["y", "x"], "a": "code", "c": True}) == {"a": "code", "b": ["x", "y"], "c": True}
+
+
+def test_cache_does_not_serve_another_selection(tmp_path):
+    cache = SuggestionCache(str(tmp_path / "cache.sqlite3"))
+    first = suggestion_key("X5", "v1", "sporty", {"upholstery": "Vernasca_Leather"})
+    second = suggestion_key("X5", "v1", "sporty", {"upholstery": "SensaTec"})
+    cache.put(first, {"recommended_config": {"interior": "Vernasca_Black"}})
+    assert cache.get(first) == {"recommended_config": {"interior": "Vernasca_Black"}}
+    assert cache.get(second) is None
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = SuggestionCache(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    cache.put("a", {"n": 1})
+    cache.put("b", {"n": 2})
+    cache.get("a")
+    cache.put("c", {"n": 3})
+    assert cache.get("a") == {"n": 1}
+    assert cache.get("b") is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = SuggestionCache(str(tmp_path / "cache.sqlite3"), ttl=-1)
+    cache.put("a", {"n": 1})
+    assert cache.get("a") is None
+
+
+def test_single_flight_shares_a_running_call_until_it_finishes():
+    flight = SingleFlight()
+    started = []
+
+    def start():
+        future = Future()
+        started.append(future)
+        return future
+
+    first = flight.join("a", start)
+    assert flight.join("a", start) is first
+    assert flight.join("b", start) is not first
+    assert flight.stats() == {"in_flight": 2, "calls": 2, "saved_calls": 1}
+    first.set_result({"n": 1})
+    assert flight.join("a", start) is not first
+    assert len(started) == 3
+
+
+def test_single_flight_never_shares_uncacheable_requests():
+    flight = SingleFlight()
+    assert flight.join(None, Future) is not flight.join(None, Future)
+    assert flight.stats()["in_flight"] == 0
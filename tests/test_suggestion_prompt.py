@@ -0,0 +1,47 @@
+from suggestion_prompt import compact_constraints, option_table, request_tail
+
+ANALYSIS = {"performance_oriented": True, "family_oriented": True}
+
+
+def test_request_tail_keeps_every_selected_value():
+    tail = request_tail("sporty", ANALYSIS, {
+        "engine": "B58_3_0T",
+        "upholstery": "Vernasca_Black",
+        "package": ["Premium_Package", "M_Sport_Package"],
+        "individual_option": ["Sunroof"],
+    })
+    assert ('CURRENT CONFIGURATION: {"engine":"B58_3_0T","individual_option":["Sunroof"],'
+            '"package":["M_Sport_Package","Premium_Package"],"upholstery":"Vernasca_Black"}') in tail
+    assert "DETECTED FOCUS: performance, family" in tail
+
+
+def test_request_tail_is_stable_across_orderings():
+    first = request_tail("sporty", ANALYSIS, {"package": ["B", "A"], "engine": "E"})
+    second = request_tail("sporty", ANALYSIS, {"engine": "E", "package": ["A", "B"]})
+    assert first == second
+
+
+def test_option_table_omits_derivable_names():
+    table = option_table("PACKAGES", {
+        "M_Sport_Package": {"price": 3000.0},
+        "Driver_Assistance_Package": {"price": 1700, "name": "Driving Assistance Package"},
+    })
+    assert table.splitlines() == [
+        "PACKAGES (code|price|name):",
+        "M_Sport_Package|3000",
+        "Driver_Assistance_Package|1700|Driving Assistance Package",
+    ]
+
+
+def test_compact_constraints_keep_only_the_models_options():
+    constraints = {
+        "engine_drivetrain": {"B58_3_0T": ["RWD", "xDrive"], "S58_3_0T": ["RWD"]},
+        "package_dependencies": {"Executive_Package": ["Premium_Package"]},
+        "incompatible_options": [{"options": ["Sunroof", "Carbon_Fiber_Roof"]},
+                                 {"options": ["Sunroof", "Head_Up_Display"]}],
+    }
+    text = compact_constraints(constraints, ["B58_3_0T", "xDrive", "Sunroof", "Head_Up_Display"])
+    assert text.splitlines() == [
+        "Engine drivetrains: B58_3_0T=xDrive",
+        "Never combine: Sunroof+Head_Up_Display",
+    ]